@@ -0,0 +1,71 @@
+"""Work item youtrack id unique per tenant
+
+Revision ID: e2b7c4a9d6f3
+Revises: 7a1f5c3e9b28
+Create Date: 2026-10-19 23:18:40.527104
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7c4a9d6f3'
+down_revision: Union[str, None] = '7a1f5c3e9b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # youtrack ids are unique per instance, so per tenant of the project.
+    # The tenant is reached through project_member and partitioned
+    # work_item can't have unique constraints without the partition key,
+    # so uniqueness is guarded by the trigger.  Advisory lock serializes
+    # concurrent writes of the same id.
+    op.execute("""
+        CREATE FUNCTION work_item_check_youtrack_id() RETURNS trigger AS $$
+        DECLARE
+            item_tenant_id integer;
+        BEGIN
+            SELECT project.tenant_id INTO item_tenant_id
+            FROM project_member
+            JOIN project ON project.id = project_member.project_id
+            WHERE project_member.id = NEW.project_member_id;
+
+            PERFORM pg_advisory_xact_lock(
+                hashtext('work_item.youtrack_id:' || NEW.youtrack_id)
+            );
+            IF EXISTS (
+                SELECT 1
+                FROM work_item
+                JOIN project_member
+                    ON project_member.id = work_item.project_member_id
+                JOIN project ON project.id = project_member.project_id
+                WHERE work_item.youtrack_id = NEW.youtrack_id
+                    AND work_item.id <> NEW.id
+                    AND project.tenant_id
+                        IS NOT DISTINCT FROM item_tenant_id
+            ) THEN
+                RAISE EXCEPTION
+                    'work item with youtrack id % already exists',
+                    NEW.youtrack_id
+                    USING ERRCODE = 'unique_violation';
+            END IF;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(
+        "CREATE TRIGGER work_item_youtrack_id_unique"
+        " BEFORE INSERT OR UPDATE OF youtrack_id, project_member_id"
+        " ON work_item FOR EACH ROW"
+        " EXECUTE FUNCTION work_item_check_youtrack_id()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS work_item_youtrack_id_unique"
+               " ON work_item")
+    op.execute("DROP FUNCTION IF EXISTS work_item_check_youtrack_id()")
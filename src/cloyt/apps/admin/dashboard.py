@@ -0,0 +1,107 @@
+from datetime import date, timedelta
+
+from sqladmin import BaseView, expose
+from sqlalchemy import Select, select, func
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.requests import Request
+from starlette.responses import Response
+
+from cloyt.domain.models import (
+    Employee,
+    Project,
+    WorkItemDailyTotal,
+    WorkItemType,
+)
+
+
+def _filter(
+        stmt: Select,
+        date_from: date,
+        date_to: date,
+        employee_id: int | None,
+) -> Select:
+    stmt = stmt.where(WorkItemDailyTotal.day.between(date_from, date_to))
+    if employee_id is not None:
+        stmt = stmt.where(WorkItemDailyTotal.employee_id == employee_id)
+    return stmt
+
+
+def _hours(duration: timedelta | None) -> float:
+    if duration is None:
+        return 0
+    return round(duration.total_seconds() / 3600, 2)
+
+
+class DashboardView(BaseView):
+    """Synced hours read from the daily totals rollup"""
+
+    name = "Dashboard"
+    icon = "fa-solid fa-chart-column"
+
+    engine: AsyncEngine
+
+    @expose("/dashboard", methods=["GET"], identity="dashboard")
+    async def dashboard_page(self, request: Request) -> Response:
+        today = date.today()
+        try:
+            date_from = date.fromisoformat(
+                request.query_params.get("date_from")
+                or today.replace(day=1).isoformat()
+            )
+            date_to = date.fromisoformat(
+                request.query_params.get("date_to") or today.isoformat()
+            )
+            employee_id = request.query_params.get("employee_id")
+            employee_id = int(employee_id) if employee_id else None
+        except ValueError:
+            date_from, date_to = today.replace(day=1), today
+            employee_id = None
+
+        duration = func.sum(WorkItemDailyTotal.duration)
+        work_items = func.sum(WorkItemDailyTotal.work_items)
+        totals_stmt = _filter(
+            select(
+                Employee.full_name,
+                Project.short_name,
+                WorkItemType.name,
+                duration,
+                work_items,
+            )
+            .join(Employee, Employee.id == WorkItemDailyTotal.employee_id)
+            .join(Project, Project.id == WorkItemDailyTotal.project_id)
+            .outerjoin(WorkItemType,
+                       WorkItemType.id == WorkItemDailyTotal.work_item_type_id)
+            .group_by(Employee.full_name, Project.short_name,
+                      WorkItemType.name)
+            .order_by(Employee.full_name, duration.desc()),
+            date_from, date_to, employee_id,
+        )
+        days_stmt = _filter(
+            select(WorkItemDailyTotal.day, duration, work_items)
+            .group_by(WorkItemDailyTotal.day)
+            .order_by(WorkItemDailyTotal.day),
+            date_from, date_to, employee_id,
+        )
+        async with self.engine.connect() as connection:
+            totals = [
+                (employee, project, work_item_type, _hours(hours), count)
+                for employee, project, work_item_type, hours, count
+                in await connection.execute(totals_stmt)
+            ]
+            days = [
+                (day, _hours(hours), count)
+                for day, hours, count in await connection.execute(days_stmt)
+            ]
+
+        return await self.templates.TemplateResponse(
+            request,
+            "dashboard.html",
+            context={
+                "date_from": date_from,
+                "date_to": date_to,
+                "employee_id": employee_id,
+                "totals": totals,
+                "days": days,
+                "total_hours": round(sum(i[1] for i in days), 2),
+            },
+        )
@@ -0,0 +1,224 @@
+import csv
+import io
+from datetime import date, datetime, time, timedelta
+from typing import AsyncIterator
+
+from sqladmin import BaseView, expose
+from sqlalchemy import Float, Select, cast, select, func
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+
+from cloyt.domain.models import (
+    Employee,
+    Project,
+    ProjectMember,
+    WorkItem,
+    WorkItemType,
+)
+
+
+EXPORT_PARTITION_SIZE = 5_000
+
+EXPORT_COLUMNS = [
+    "id",
+    "date",
+    "employee_id",
+    "employee",
+    "project",
+    "project_short_name",
+    "issue_id",
+    "work_item_type",
+    "duration_seconds",
+    "text",
+    "clockify_time_entry_id",
+    "youtrack_id",
+    "created_at",
+]
+
+
+def export_query(
+        date_from: date | None,
+        date_to: date | None,
+        employee_id: int | None,
+) -> Select:
+    work_date = func.coalesce(WorkItem.started_at, WorkItem.created_at)
+    stmt = (
+        select(
+            WorkItem.id,
+            work_date,
+            Employee.id,
+            Employee.full_name,
+            Project.name,
+            Project.short_name,
+            WorkItem.issue_id,
+            WorkItemType.name,
+            # numeric on postgres 14+, that parquet float column rejects
+            cast(func.extract("epoch", WorkItem.duration), Float),
+            WorkItem.text,
+            WorkItem.clockify_time_entry_id,
+            WorkItem.youtrack_id,
+            WorkItem.created_at,
+        )
+        .join(ProjectMember, ProjectMember.id == WorkItem.project_member_id)
+        .join(Employee, Employee.id == ProjectMember.employee_id)
+        .join(Project, Project.id == ProjectMember.project_id)
+        .outerjoin(WorkItemType,
+                   WorkItemType.id == WorkItem.work_item_type_id)
+        .order_by(work_date, WorkItem.id)
+    )
+    if date_from is not None:
+        stmt = stmt.where(work_date >= datetime.combine(date_from, time()))
+    if date_to is not None:
+        stmt = stmt.where(work_date < datetime.combine(
+            date_to + timedelta(days=1), time(),
+        ))
+    if employee_id is not None:
+        stmt = stmt.where(Employee.id == employee_id)
+    return stmt
+
+
+async def iter_export_rows(
+        engine: AsyncEngine,
+        stmt: Select,
+) -> AsyncIterator[list[tuple]]:
+    """Fetch export rows in partitions from the server-side cursor"""
+
+    async with engine.connect() as connection:
+        result = await connection.stream(
+            stmt.execution_options(yield_per=EXPORT_PARTITION_SIZE),
+        )
+        async for partition in result.partitions():
+            yield [tuple(i) for i in partition]
+
+
+async def stream_csv(engine: AsyncEngine, stmt: Select) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    async for rows in iter_export_rows(engine, stmt):
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file, that hands written bytes out by chunks
+
+    Unlike truncated `BytesIO`, it keeps the absolute position, that the
+    parquet writer uses for the footer offsets.
+
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.chunks: list[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self.chunks.append(bytes(b))
+        self.position += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self.position
+
+    def pop(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+async def stream_parquet(
+        engine: AsyncEngine,
+        stmt: Select,
+) -> AsyncIterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("date", pa.timestamp("us")),
+        ("employee_id", pa.int64()),
+        ("employee", pa.string()),
+        ("project", pa.string()),
+        ("project_short_name", pa.string()),
+        ("issue_id", pa.string()),
+        ("work_item_type", pa.string()),
+        ("duration_seconds", pa.float64()),
+        ("text", pa.string()),
+        ("clockify_time_entry_id", pa.string()),
+        ("youtrack_id", pa.string()),
+        ("created_at", pa.timestamp("us")),
+    ])
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        async for rows in iter_export_rows(engine, stmt):
+            writer.write_table(pa.Table.from_pylist(
+                [dict(zip(EXPORT_COLUMNS, i)) for i in rows],
+                schema=schema,
+            ))
+            yield sink.pop()
+    yield sink.pop()
+
+
+def _parse_query_param(request: Request, name: str, parse):
+    raw = request.query_params.get(name)
+    if not raw:
+        return None
+    return parse(raw)
+
+
+class ExportView(BaseView):
+    name = "Export"
+    icon = "fa-solid fa-file-export"
+
+    engine: AsyncEngine
+
+    @expose("/export", methods=["GET"], identity="export")
+    async def export_page(self, request: Request) -> Response:
+        return await self.templates.TemplateResponse(request, "export.html")
+
+    @expose("/export/work-items.{file_format}", methods=["GET"])
+    async def export_work_items(self, request: Request) -> Response:
+        try:
+            stmt = export_query(
+                date_from=_parse_query_param(
+                    request, "date_from", date.fromisoformat),
+                date_to=_parse_query_param(
+                    request, "date_to", date.fromisoformat),
+                employee_id=_parse_query_param(request, "employee_id", int),
+            )
+        except ValueError as e:
+            return PlainTextResponse(str(e), status_code=400)
+
+        file_format = request.path_params["file_format"]
+        if file_format == "csv":
+            content = stream_csv(self.engine, stmt)
+            media_type = "text/csv"
+        elif file_format == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                return PlainTextResponse(
+                    "Parquet export requires pyarrow, install cloyt[parquet]",
+                    status_code=501,
+                )
+            content = stream_parquet(self.engine, stmt)
+            media_type = "application/vnd.apache.parquet"
+        else:
+            return PlainTextResponse("Unknown export format", status_code=404)
+
+        return StreamingResponse(
+            content,
+            media_type=media_type,
+            headers={
+                "Content-Disposition":
+                    f"attachment; filename=work-items.{file_format}",
+            },
+        )
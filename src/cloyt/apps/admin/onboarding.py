@@ -0,0 +1,61 @@
+import io
+
+from sqladmin import BaseView, expose
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+
+from cloyt.apps.onboarding.importer import (
+    CSV_COLUMNS,
+    employees_insert,
+    mark_existing,
+    read_employees_csv,
+    validate_employees,
+)
+from cloyt.domain.models import Tenant
+
+
+class OnboardingView(BaseView):
+    """Bulk import of employees from the uploaded CSV"""
+
+    name = "Onboarding"
+    icon = "fa-solid fa-user-plus"
+
+    engine: AsyncEngine
+    youtrack_base_url: str
+
+    @expose("/onboarding", methods=["GET", "POST"], identity="onboarding")
+    async def onboarding_page(self, request: Request) -> Response:
+        context = {"columns": CSV_COLUMNS, "rows": None, "error": None}
+        if request.method == "POST":
+            form = await request.form()
+            upload = form.get("file")
+            dry_run = bool(form.get("dry_run"))
+            try:
+                content = (await upload.read()).decode("utf-8-sig")
+                rows = read_employees_csv(io.StringIO(content, newline=""))
+            except (AttributeError, UnicodeDecodeError, ValueError) as e:
+                context["error"] = f"Can't read CSV: {e}"
+            else:
+                async with AsyncSession(self.engine) as session:
+                    tenants = {
+                        i.name: i
+                        for i in await session.scalars(select(Tenant))
+                    }
+                await run_in_threadpool(
+                    validate_employees, rows, self.youtrack_base_url, tenants,
+                )
+                if not dry_run and any(i.valid for i in rows):
+                    async with self.engine.begin() as connection:
+                        inserted = set(await connection.scalars(
+                            employees_insert(rows),
+                        ))
+                    mark_existing(rows, inserted)
+                context.update(rows=rows, dry_run=dry_run,
+                               valid=sum(i.valid for i in rows))
+
+        return await self.templates.TemplateResponse(
+            request, "onboarding.html", context=context,
+        )
@@ -1,41 +1,85 @@
 from datetime import timedelta, datetime
-from typing import Type, Any
+from operator import attrgetter
+from os import path
+from typing import Any, Callable, Type
 
 import wtforms
 from dishka import AsyncContainer
 from fastapi import FastAPI
-from sqladmin import ModelView, Admin
+from sqladmin import ModelView, Admin, action
 from sqladmin._queries import Query
-from sqlalchemy import Select, select
+from sqlalchemy import Select, select, delete, func
 from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import joinedload
 from starlette.requests import Request
+from starlette.responses import RedirectResponse
 from wtforms import Form
 
 from cloyt.apps.admin.auth_backend import AdminAuthBackend
+from cloyt.apps.admin.dashboard import DashboardView
+from cloyt.apps.admin.export import ExportView
+from cloyt.apps.admin.onboarding import OnboardingView
+from cloyt.apps.admin.pagination import KeysetPaginationMixin
+from cloyt.apps.daemon.daily_totals import add_work_item_to_daily_totals
 from cloyt.domain.models import (
     Employee,
     Project,
     ProjectMember,
     WorkItem,
     WorkItemType,
+    SkippedTimeEntry,
+    SyncOutcome,
+    Tenant,
 )
-from cloyt.infrastructure import AdminConfig
+from cloyt.infrastructure import (
+    AdminConfig,
+    CloytConfig,
+    SYNC_NOTIFY_CHANNEL,
+)
+
+
+TEMPLATES_DIR = path.join(path.dirname(__file__), "templates")
+
+
+class SyncNotifyMixin:
+    """Notify the daemon to sync the employee of the changed model
+
+    Views set `notified_employee_id` to the resolver of the employee id
+    from their model.
 
+    """
 
-class EmployeeAdmin(ModelView, model=Employee):
+    notified_employee_id: Callable[[Any], int]
+
+    async def after_model_change(
+        self, data: dict, model: Any, is_created: bool, request: Request
+    ) -> None:
+        async with self.session_maker() as session:
+            await session.execute(select(func.pg_notify(
+                SYNC_NOTIFY_CHANNEL,
+                str(self.notified_employee_id(model)),
+            )))
+            await session.commit()
+
+
+class EmployeeAdmin(SyncNotifyMixin, ModelView, model=Employee):
     model: Type[Employee]
 
     column_list = [
         Employee.full_name,
+        Employee.tenant,
         Employee.projects,
         Employee.created_at,
     ]
     form_create_rules = [
         "full_name",
+        "tenant",
     ]
     form_edit_rules = [
         "full_name",
+        "tenant",
     ]
+    notified_employee_id = attrgetter("id")
 
     def list_query(self, request: Request) -> Select:
         stmt = (select(self.model)
@@ -71,8 +115,23 @@ class EmployeeAdmin(ModelView, model=Employee):
                 data["youtrack_token"] = model.youtrack_token
 
 
+class TenantAdmin(ModelView, model=Tenant):
+    column_list = [
+        Tenant.name,
+        Tenant.youtrack_base_url,
+        Tenant.clockify_api_url,
+        Tenant.push_concurrency,
+        Tenant.requests_per_second,
+        Tenant.created_at,
+    ]
+    form_excluded_columns = [
+        Tenant.created_at,
+    ]
+
+
 class ProjectAdmin(ModelView, model=Project):
     column_list = [
+        Project.tenant,
         Project.name,
         Project.short_name,
         Project.youtrack_id,
@@ -82,7 +141,7 @@ class ProjectAdmin(ModelView, model=Project):
     ]
 
 
-class ProjectMemberAdmin(ModelView, model=ProjectMember):
+class ProjectMemberAdmin(SyncNotifyMixin, ModelView, model=ProjectMember):
     column_list = [
         ProjectMember.employee,
         ProjectMember.project,
@@ -93,18 +152,36 @@ class ProjectMemberAdmin(ModelView, model=ProjectMember):
         "sync_enabled",
         "default_work_item_type",
     ]
+    notified_employee_id = attrgetter("employee_id")
 
 
-class WorkItemAdmin(ModelView, model=WorkItem):
+class WorkItemAdmin(KeysetPaginationMixin, ModelView, model=WorkItem):
     column_list = [
         WorkItem.text,
         WorkItem.clockify_time_entry_id,
         WorkItem.youtrack_id,
         WorkItem.work_item_type,
+        WorkItem.created_at,
     ]
     can_edit = False
     can_create = False
 
+    def list_query(self, request: Request) -> Select:
+        return (select(self.model)
+                .options(joinedload(self.model.work_item_type)))
+
+    async def delete_model(self, request: Request, pk: Any) -> None:
+        async with self.session_maker() as session:
+            work_item = await session.get(self.model, int(pk))
+            if work_item is None:
+                return
+            await session.delete(work_item)
+            # daily totals must follow the work item in the same transaction
+            await session.run_sync(
+                add_work_item_to_daily_totals, work_item, -1,
+            )
+            await session.commit()
+
 
 class WorkItemTypeAdmin(ModelView, model=WorkItemType):
     column_list = [
@@ -118,20 +195,116 @@ class WorkItemTypeAdmin(ModelView, model=WorkItemType):
     ]
 
 
+class SkippedTimeEntryAdmin(ModelView, model=SkippedTimeEntry):
+    column_list = [
+        SkippedTimeEntry.employee,
+        SkippedTimeEntry.clockify_time_entry_id,
+        SkippedTimeEntry.reason,
+        SkippedTimeEntry.details,
+        SkippedTimeEntry.attempts,
+        SkippedTimeEntry.retry_after,
+        SkippedTimeEntry.created_at,
+    ]
+    column_searchable_list = [
+        SkippedTimeEntry.clockify_time_entry_id,
+    ]
+    column_sortable_list = [
+        SkippedTimeEntry.attempts,
+        SkippedTimeEntry.retry_after,
+        SkippedTimeEntry.created_at,
+    ]
+    can_edit = False
+    can_create = False
+
+    @action(
+        name="retry",
+        label="Retry",
+        confirmation_message="Retry selected time entries on the next"
+                             " sync iteration?",
+        add_in_detail=True,
+        add_in_list=True,
+    )
+    async def retry(self, request: Request) -> RedirectResponse:
+        pks = request.query_params.get("pks", "").split(",")
+        async with self.session_maker() as session:
+            await session.execute(
+                delete(self.model)
+                .where(self.model.id.in_([int(i) for i in pks if i]))
+            )
+            await session.commit()
+        return RedirectResponse(
+            request.url_for("admin:list", identity=self.identity),
+        )
+
+
+class SyncOutcomeAdmin(KeysetPaginationMixin, ModelView, model=SyncOutcome):
+    column_list = [
+        SyncOutcome.employee,
+        SyncOutcome.clockify_time_entry_id,
+        SyncOutcome.outcome,
+        SyncOutcome.issue_id,
+        SyncOutcome.details,
+        SyncOutcome.created_at,
+    ]
+    column_searchable_list = [
+        SyncOutcome.clockify_time_entry_id,
+        SyncOutcome.issue_id,
+        SyncOutcome.outcome,
+    ]
+    column_sortable_list = [
+        SyncOutcome.outcome,
+        SyncOutcome.created_at,
+    ]
+    can_edit = False
+    can_create = False
+
+    def list_query(self, request: Request) -> Select:
+        return (select(self.model)
+                .options(joinedload(self.model.employee)))
+
+
+MODEL_VIEWS: list[type[ModelView]] = [
+    TenantAdmin,
+    EmployeeAdmin,
+    ProjectAdmin,
+    WorkItemTypeAdmin,
+    ProjectMemberAdmin,
+    WorkItemAdmin,
+    SkippedTimeEntryAdmin,
+    SyncOutcomeAdmin,
+]
+
+
 async def setup_admin(container: AsyncContainer, app: FastAPI) -> Admin:
     engine = await container.get(AsyncEngine)
     config: AdminConfig = await container.get(AdminConfig)
-    admin = Admin(app, engine, authentication_backend=AdminAuthBackend(
-        secret_key=config.secret_key,
-        username=config.username,
-        password=config.password,
-        login_duration=timedelta(days=30),
-    ))
-
-    admin.add_view(EmployeeAdmin)
-    admin.add_view(ProjectAdmin)
-    admin.add_view(WorkItemTypeAdmin)
-    admin.add_view(ProjectMemberAdmin)
-    admin.add_view(WorkItemAdmin)
+    admin = Admin(
+        app,
+        engine,
+        authentication_backend=AdminAuthBackend(
+            secret_key=config.secret_key,
+            username=config.username,
+            password=config.password,
+            login_duration=timedelta(days=30),
+        ),
+        templates_dir=TEMPLATES_DIR,
+    )
+
+    for i in MODEL_VIEWS:
+        admin.add_view(i)
+
+    DashboardView.engine = engine
+    admin.add_view(DashboardView)
+    ExportView.engine = engine
+    admin.add_view(ExportView)
+
+    # tokens are validated against youtrack of the daemon configuration
+    cloyt_config: CloytConfig = await container.get(CloytConfig)
+    if cloyt_config.daemon is not None:
+        OnboardingView.engine = engine
+        OnboardingView.youtrack_base_url = (
+            cloyt_config.daemon.youtrack_base_url
+        )
+        admin.add_view(OnboardingView)
 
     return admin
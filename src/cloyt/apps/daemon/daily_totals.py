@@ -0,0 +1,120 @@
+from datetime import date, timedelta
+
+from sqlalchemy import (
+    Connection,
+    Date,
+    Integer,
+    Interval,
+    delete,
+    func,
+    literal,
+    select,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from cloyt.domain.models import ProjectMember, WorkItem, WorkItemDailyTotal
+
+
+def work_item_day(work_item: WorkItem) -> date:
+    return (work_item.started_at or work_item.created_at).date()
+
+
+def apply_daily_total_delta(
+        session: Session,
+        *,
+        project_member_id: int,
+        work_item_type_id: int | None,
+        day: date,
+        duration: timedelta,
+        sign: int,
+):
+    """Add (or subtract, with negative sign) work item to daily totals
+
+    Must be called in the transaction that inserts (or deletes) the work
+    item, so the totals are consistent with the `work_item` table.
+
+    """
+
+    table = WorkItemDailyTotal.__table__
+    stmt = (
+        insert(WorkItemDailyTotal)
+        .from_select(
+            [
+                table.c.day,
+                table.c.employee_id,
+                table.c.project_id,
+                table.c.work_item_type_id,
+                table.c.duration,
+                table.c.work_items,
+            ],
+            select(
+                literal(day, Date),
+                ProjectMember.employee_id,
+                ProjectMember.project_id,
+                literal(work_item_type_id, Integer),
+                literal(duration * sign, Interval),
+                literal(sign, Integer),
+            )
+            .where(ProjectMember.id == project_member_id),
+        )
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_work_item_daily_total",
+        set_={
+            table.c.duration: table.c.duration + stmt.excluded.duration,
+            table.c.work_items: table.c.work_items + stmt.excluded.work_items,
+        },
+    )
+    session.execute(stmt)
+
+
+def add_work_item_to_daily_totals(
+        session: Session,
+        work_item: WorkItem,
+        sign: int = 1,
+):
+    apply_daily_total_delta(
+        session,
+        project_member_id=work_item.project_member_id,
+        work_item_type_id=work_item.work_item_type_id,
+        day=work_item_day(work_item),
+        duration=work_item.duration,
+        sign=sign,
+    )
+
+
+def rebuild_daily_totals(connection: Connection):
+    """Recompute all daily totals from the `work_item` table"""
+
+    connection.execute(delete(WorkItemDailyTotal))
+    day = func.date(func.coalesce(WorkItem.started_at, WorkItem.created_at))
+    connection.execute(
+        insert(WorkItemDailyTotal)
+        .from_select(
+            [
+                "day",
+                "employee_id",
+                "project_id",
+                "work_item_type_id",
+                "duration",
+                "work_items",
+            ],
+            select(
+                day,
+                ProjectMember.employee_id,
+                ProjectMember.project_id,
+                WorkItem.work_item_type_id,
+                func.sum(WorkItem.duration),
+                func.count(),
+            )
+            .join(ProjectMember,
+                  ProjectMember.id == WorkItem.project_member_id)
+            .group_by(
+                day,
+                ProjectMember.employee_id,
+                ProjectMember.project_id,
+                WorkItem.work_item_type_id,
+            ),
+        )
+    )
@@ -0,0 +1,114 @@
+import hashlib
+import re
+from datetime import datetime, tzinfo
+
+import msgspec
+import requests
+
+from cloyt.domain.models import Employee
+
+
+CLOCKIFY_API_URL = "https://api.clockify.me/v1"
+
+CLOCKIFY_TIMEOUT = 10
+
+ISSUE_ID_PATTERN = re.compile(r"(\S+)-(\d+)\s*(.*)\s*")
+
+
+class TimeInterval(msgspec.Struct):
+    start: str
+    end: str | None = None
+
+
+class TimeEntry(msgspec.Struct, rename="camel"):
+    """Clockify time entry with the fields used by the daemon
+
+    Entries are decoded straight from the response bytes, other fields of
+    the response are skipped by the decoder.  Timestamps are parsed once,
+    after decoding.  Raw timestamps are kept, because fingerprints of
+    synced work items are built from them.
+
+    """
+
+    id: str
+    time_interval: TimeInterval
+    description: str = ""
+    # parsed from the time interval, not present in the response
+    start: datetime | None = None
+    end: datetime | None = None
+
+    def __post_init__(self):
+        self.start = datetime.fromisoformat(self.time_interval.start)
+        if self.time_interval.end is not None:
+            self.end = datetime.fromisoformat(self.time_interval.end)
+
+
+TIME_ENTRIES_DECODER = msgspec.json.Decoder(list[TimeEntry])
+
+
+def get_time_entries(
+        employee: Employee,
+        params: dict,
+        api_url: str = CLOCKIFY_API_URL,
+) -> list[TimeEntry]:
+    response = requests.get(
+        f"{api_url}/workspaces/{employee.clockify_workspace_id}"
+        f"/user/{employee.clockify_user_id}/time-entries",
+        params=params,
+        headers={"X-Api-Key": employee.clockify_token},
+        timeout=CLOCKIFY_TIMEOUT,
+    )
+    if response.status_code != 200:
+        raise Exception(response.json())
+    return TIME_ENTRIES_DECODER.decode(response.content)
+
+
+def get_clockify_user(
+        token: str,
+        api_url: str = CLOCKIFY_API_URL,
+) -> dict:
+    """Return the user owning the token, with `id` and `activeWorkspace`"""
+
+    response = requests.get(
+        f"{api_url}/user",
+        headers={"X-Api-Key": token},
+        timeout=CLOCKIFY_TIMEOUT,
+    )
+    if response.status_code != 200:
+        raise Exception(response.json())
+    return response.json()
+
+
+def parse_issue_id(description: str) -> tuple[str, str, str] | None:
+    """Return project short name, issue id and text of the description"""
+
+    match = ISSUE_ID_PATTERN.match(description.strip())
+    if match is None:
+        return None
+    short_name, number, text = match.groups()
+    return short_name, f"{short_name}-{number}", text
+
+
+def time_entry_fingerprint(entry: TimeEntry) -> str:
+    """Hash of the time entry fields that affect the synced work item"""
+
+    payload = "\x1f".join((
+        entry.description,
+        entry.time_interval.start,
+        entry.time_interval.end or "",
+    ))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def to_naive_local(dt: datetime, tz: tzinfo) -> datetime:
+    """Convert to naive datetime of the tz, as stored in the database"""
+
+    return dt.astimezone(tz).replace(tzinfo=None)
+
+
+def work_item_minutes(start: datetime, end: datetime) -> int:
+    # note: you cannot create zero minute work item in youtrack.
+    return max(
+        round((end - start).total_seconds() / 60),
+        1,
+    )
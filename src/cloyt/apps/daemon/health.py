@@ -0,0 +1,189 @@
+import json
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging import getLogger
+from threading import Lock, Thread
+
+from cloyt.infrastructure import DaemonConfig
+
+
+logger = getLogger(__name__)
+
+
+@dataclass
+class EmployeeLag:
+    synced_at: datetime | None = None
+    last_lag_seconds: float | None = None
+    max_lag_seconds: float = 0
+    pending_since: datetime | None = None
+    # when the employee became active for the daemon
+    tracked_since: datetime | None = None
+
+
+class SyncHealth:
+    """Iteration age and sync lag of every employee
+
+    Sync lag is the time from the end of a time entry to the creation of
+    its work item.  Pending lag is the age of the oldest entry, which
+    push failed on the last sync of the employee; it keeps growing while
+    the entry is not synced.  Sync age is the time since the last
+    successful sync of the employee.  Iteration is successful, when no
+    employee sync failed in it.
+
+    """
+
+    def __init__(self, config: DaemonConfig):
+        self.config = config
+        self.lock = Lock()
+        self.started_at = datetime.now(tz=timezone.utc)
+        self.iteration_started_at: datetime | None = None
+        self.iteration_finished_at: datetime | None = None
+        self.iteration_succeeded_at: datetime | None = None
+        self.iteration_failures = 0
+        self.employees: dict[int, EmployeeLag] = {}
+
+    def start_iteration(self):
+        with self.lock:
+            self.iteration_started_at = datetime.now(tz=timezone.utc)
+            self.iteration_failures = 0
+
+    def finish_iteration(self):
+        with self.lock:
+            self.iteration_finished_at = datetime.now(tz=timezone.utc)
+            if not self.iteration_failures:
+                self.iteration_succeeded_at = self.iteration_finished_at
+
+    def track_employees(self, employee_ids: set[int]):
+        """Forget deleted employees and start tracking the new ones"""
+
+        now = datetime.now(tz=timezone.utc)
+        with self.lock:
+            for i in set(self.employees) - employee_ids:
+                del self.employees[i]
+            for i in employee_ids:
+                employee = self.employees.setdefault(i, EmployeeLag())
+                if employee.tracked_since is None:
+                    employee.tracked_since = now
+
+    def record_work_item(self, employee_id: int, entry_ended_at: datetime):
+        lag = (datetime.now(tz=timezone.utc) - entry_ended_at).total_seconds()
+        with self.lock:
+            employee = self.employees.setdefault(employee_id, EmployeeLag())
+            employee.last_lag_seconds = lag
+            employee.max_lag_seconds = max(employee.max_lag_seconds, lag)
+
+    def record_employee_sync(
+            self,
+            employee_id: int,
+            pending_ends: list[datetime],
+    ):
+        with self.lock:
+            employee = self.employees.setdefault(employee_id, EmployeeLag())
+            employee.synced_at = datetime.now(tz=timezone.utc)
+            employee.pending_since = min(pending_ends, default=None)
+
+    def record_employee_failure(self, employee_id: int):
+        with self.lock:
+            self.iteration_failures += 1
+
+    def report(self) -> tuple[bool, dict]:
+        """Return readiness and the report for the health endpoint"""
+
+        now = datetime.now(tz=timezone.utc)
+        config = self.config
+        with self.lock:
+            iteration_age = None
+            if self.iteration_succeeded_at is not None:
+                iteration_age = (
+                    now - self.iteration_succeeded_at
+                ).total_seconds()
+            employees = {}
+            max_pending_lag = 0
+            stale_employee_ids = []
+            for employee_id, lag in self.employees.items():
+                pending_lag = None
+                if lag.pending_since is not None:
+                    pending_lag = (now - lag.pending_since).total_seconds()
+                    max_pending_lag = max(max_pending_lag, pending_lag)
+                sync_age = None
+                if lag.synced_at is not None:
+                    sync_age = (now - lag.synced_at).total_seconds()
+                # never synced employee is stale since it is tracked
+                since = lag.synced_at or lag.tracked_since
+                if (since is not None
+                        and (now - since).total_seconds()
+                        > config.health_max_sync_lag_seconds):
+                    stale_employee_ids.append(employee_id)
+                employees[employee_id] = {
+                    **asdict(lag),
+                    "pending_lag_seconds": pending_lag,
+                    "sync_age_seconds": sync_age,
+                }
+
+        problems = []
+        if iteration_age is None:
+            problems.append("no successful iteration yet")
+        elif iteration_age > config.health_max_iteration_age_seconds:
+            problems.append(f"last successful iteration finished"
+                            f" {iteration_age:.0f}s ago")
+        if max_pending_lag > config.health_max_sync_lag_seconds:
+            problems.append(f"sync lag is {max_pending_lag:.0f}s")
+        if stale_employee_ids:
+            problems.append(
+                f"employees {sorted(stale_employee_ids)} not synced for over"
+                f" {config.health_max_sync_lag_seconds}s"
+            )
+        return not problems, {
+            "ready": not problems,
+            "problems": problems,
+            "started_at": self.started_at,
+            "iteration_started_at": self.iteration_started_at,
+            "iteration_finished_at": self.iteration_finished_at,
+            "iteration_succeeded_at": self.iteration_succeeded_at,
+            "iteration_age_seconds": iteration_age,
+            "max_pending_lag_seconds": max_pending_lag,
+            "employees": employees,
+        }
+
+
+class HealthRequestHandler(BaseHTTPRequestHandler):
+    health: SyncHealth
+
+    def _respond(self, status: int, payload: dict):
+        body = json.dumps(payload, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        ready, report = self.health.report()
+        if self.path == "/health":
+            self._respond(200, report)
+        elif self.path == "/ready":
+            self._respond(200 if ready else 503, report)
+        else:
+            self._respond(404, {"detail": "not found"})
+
+    def log_message(self, format, *args):
+        logger.debug("Health request: " + format, *args)
+
+
+def serve_health(health: SyncHealth, port: int) -> ThreadingHTTPServer:
+    """Serve `/health` (liveness) and `/ready` (readiness) endpoints"""
+
+    handler = type(
+        "BoundHealthRequestHandler",
+        (HealthRequestHandler,),
+        {"health": health},
+    )
+    server = ThreadingHTTPServer(("0.0.0.0", port), handler)
+    Thread(
+        target=server.serve_forever,
+        name="health-server",
+        daemon=True,
+    ).start()
+    logger.info("Serve health endpoints on port %s", port)
+    return server
@@ -0,0 +1,62 @@
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any
+
+
+# responses of all token scopes of the tenant, least recently used go first
+RESPONSE_CACHE_MAX_ENTRIES = 50_000
+
+
+@dataclass
+class CachedResponse:
+    content_hash: str
+    body: Any
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+def token_scope(token: str) -> str:
+    """Cache scope of the token, without keeping the token itself"""
+
+    return hashlib.sha256(token.encode()).hexdigest()[:32]
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class ResponseCache:
+    """Responses of slow-changing endpoints per token scope
+
+    Responses depend on the permissions of the token, so they are never
+    shared between scopes.  Validators are sent back by the client for
+    revalidation; when the server does not support them, the content hash
+    tells whether the response changed.  Shared by the threads of one
+    tenant.
+
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries: OrderedDict[tuple, CachedResponse] = OrderedDict()
+        self.lock = Lock()
+
+    @staticmethod
+    def key(scope: str, path: str, params: dict | None) -> tuple:
+        return scope, path, tuple(sorted((params or {}).items()))
+
+    def get(self, key: tuple) -> CachedResponse | None:
+        with self.lock:
+            cached = self.entries.get(key)
+            if cached is not None:
+                self.entries.move_to_end(key)
+            return cached
+
+    def put(self, key: tuple, response: CachedResponse):
+        with self.lock:
+            self.entries[key] = response
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from cloyt.domain.models import SyncOutcome, SyncOutcomeKind
+
+
+COPY_SYNC_OUTCOMES = (
+    "COPY sync_outcome (employee_id, clockify_time_entry_id, outcome,"
+    " issue_id, details, created_at) FROM STDIN"
+)
+
+
+class SyncJournal:
+    """Outcomes of time entries collected during one employee sync
+
+    Outcomes are kept in memory and written at once by
+    `write_sync_journal`, so journaling costs a single COPY per sync.
+    The sync window is fetched again every iteration, so outcome, that
+    repeats the last one of the entry, is not recorded; last outcomes
+    are shared by the journals of the employee.
+
+    """
+
+    def __init__(
+            self,
+            employee_id: int,
+            last_outcomes: dict[str, tuple] | None = None,
+    ):
+        self.employee_id = employee_id
+        self.rows: list[tuple] = []
+        self.last_outcomes = {} if last_outcomes is None else last_outcomes
+
+    def record(
+            self,
+            time_entry_id: str,
+            outcome: SyncOutcomeKind,
+            issue_id: str | None = None,
+            details: str | None = None,
+    ):
+        state = (outcome.value, issue_id, details)
+        if self.last_outcomes.get(time_entry_id) == state:
+            return
+        self.last_outcomes[time_entry_id] = state
+        self.rows.append((
+            self.employee_id,
+            time_entry_id,
+            outcome.value,
+            issue_id,
+            details,
+            datetime.now(),
+        ))
+
+    def keep_last_outcomes(self, time_entry_ids: set[str]):
+        """Forget last outcomes of the entries out of the sync window"""
+
+        for i in self.last_outcomes.keys() - time_entry_ids:
+            del self.last_outcomes[i]
+
+
+def write_sync_journal(session: Session, journal: SyncJournal):
+    if not journal.rows:
+        return
+    driver_connection = session.connection().connection.driver_connection
+    with driver_connection.cursor() as cursor:
+        with cursor.copy(COPY_SYNC_OUTCOMES) as copy:
+            for i in journal.rows:
+                copy.write_row(i)
+    session.commit()
+    journal.rows.clear()
+
+
+def prune_sync_outcomes(session: Session, retention_days: int) -> int:
+    """Delete outcomes older than the retention, return their number"""
+
+    result = session.execute(
+        delete(SyncOutcome)
+        .where(SyncOutcome.created_at
+               < datetime.now() - timedelta(days=retention_days))
+    )
+    session.commit()
+    return result.rowcount
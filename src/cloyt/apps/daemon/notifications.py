@@ -0,0 +1,93 @@
+import time
+from logging import getLogger
+
+import psycopg
+
+from cloyt.infrastructure import PostgresConfig, SYNC_NOTIFY_CHANNEL
+
+
+logger = getLogger(__name__)
+
+
+# time to collect more notifications after the first one, so a series of
+# admin changes triggers a single sync of the employee
+DEBOUNCE_SECONDS = 1
+
+RECONNECT_BASE_SECONDS = 5
+
+RECONNECT_MAX_SECONDS = 300
+
+
+class SyncListener:
+    """Listen to sync notifications of the admin
+
+    Notifications are buffered by the connection while the daemon syncs,
+    so changes made during an iteration are not lost.  Lost connection is
+    restored with exponential backoff; notifications sent meanwhile are
+    lost, their employees are synced by the next iteration.
+
+    """
+
+    def __init__(self, postgres_config: PostgresConfig):
+        self.postgres_config = postgres_config
+        self.connection: psycopg.Connection | None = None
+        self.failures = 0
+        self.reconnect_at = 0.0
+
+    def listen(self):
+        self.connection = psycopg.connect(
+            **self.postgres_config.get_conninfo(),
+            autocommit=True,
+        )
+        self.connection.execute(f"LISTEN {SYNC_NOTIFY_CHANNEL}")
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def disconnect(self, error: Exception):
+        """Close the failed connection and schedule reconnection"""
+
+        self.close()
+        self.failures += 1
+        delay = min(RECONNECT_BASE_SECONDS * 2 ** (self.failures - 1),
+                    RECONNECT_MAX_SECONDS)
+        self.reconnect_at = time.monotonic() + delay
+        logger.warning("Sync notifications are not received, changes made"
+                       " in the admin wait for the next iteration, retry"
+                       " in %ss: `%s`", delay, error)
+
+    def ensure_listening(self) -> bool:
+        """Reconnect, if it is due, return whether the listener works"""
+
+        if self.connection is not None:
+            return True
+        if time.monotonic() < self.reconnect_at:
+            return False
+        try:
+            self.listen()
+        except psycopg.Error as e:
+            self.disconnect(e)
+            return False
+        if self.failures:
+            logger.info("Listen to sync notifications again")
+        self.failures = 0
+        return True
+
+    def _collect(self, employee_ids: set[int], **kwargs):
+        for i in self.connection.notifies(**kwargs):
+            try:
+                employee_ids.add(int(i.payload))
+            except ValueError:
+                logger.warning("Unexpected sync notification payload `%s`",
+                               i.payload)
+
+    def wait(self, timeout: float) -> set[int]:
+        """Wait for notifications, return ids of the notified employees"""
+
+        employee_ids: set[int] = set()
+        self._collect(employee_ids, timeout=timeout, stop_after=1)
+        if employee_ids:
+            self._collect(employee_ids, timeout=DEBOUNCE_SECONDS)
+        return employee_ids
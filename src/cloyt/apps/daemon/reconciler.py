@@ -0,0 +1,512 @@
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from logging import getLogger
+from typing import Iterator
+
+from dishka import Container
+from sqlalchemy import select, delete, insert, func
+from sqlalchemy.orm import Session
+from youtrack_sdk.exceptions import (
+    YouTrackException,
+    YouTrackNotFound,
+    YouTrackUnauthorized,
+)
+
+from cloyt.apps.daemon.daily_totals import (
+    add_work_item_to_daily_totals,
+    apply_daily_total_delta,
+)
+from cloyt.apps.daemon.entries import (
+    TimeEntry,
+    get_time_entries,
+    parse_issue_id,
+    time_entry_fingerprint,
+    to_naive_local,
+    work_item_minutes,
+)
+from cloyt.apps.daemon.synchronizer import build_youtrack_client
+from cloyt.apps.daemon.tenants import TenantRuntime, build_tenant_runtimes
+from cloyt.apps.daemon.youtrack import CloytYouTrackClient
+from cloyt.domain.models import (
+    Employee,
+    Project,
+    ProjectMember,
+    Tenant,
+    WorkItem,
+)
+from cloyt.infrastructure import DaemonConfig, SYNC_NOTIFY_CHANNEL
+
+
+logger = getLogger(__name__)
+
+
+CLOCKIFY_PAGE_SIZE = 1000
+
+# all work items inserted by the daemon contain this text
+WORK_ITEM_TEXT_MARK = "from clockify at"
+
+# youtrack keeps the date of work item as utc day, so local range edges
+# may fall to the neighbour days
+YOUTRACK_DATE_MARGIN = timedelta(days=1)
+
+
+@dataclass
+class ReconciliationReport:
+    employees: int = 0
+    youtrack_work_items: int = 0
+    clockify_time_entries: int = 0
+    database_work_items: int = 0
+    missing_in_youtrack: list[str] = field(default_factory=list)
+    untracked: list[str] = field(default_factory=list)
+    duplicates: list[str] = field(default_factory=list)
+    unknown: list[str] = field(default_factory=list)
+    stale: list[str] = field(default_factory=list)
+    repaired: int = 0
+    fetch_seconds: float = 0
+    compare_seconds: float = 0
+    repair_seconds: float = 0
+
+    def format(self) -> str:
+        fetched = (self.youtrack_work_items
+                   + self.clockify_time_entries
+                   + self.database_work_items)
+        lines = [
+            f"Employees:                {self.employees}",
+            f"YouTrack work items:      {self.youtrack_work_items}",
+            f"Clockify time entries:    {self.clockify_time_entries}",
+            f"Database work items:      {self.database_work_items}",
+            f"Missing in YouTrack:      {len(self.missing_in_youtrack)}",
+            f"Untracked in database:    {len(self.untracked)}",
+            f"Duplicates in YouTrack:   {len(self.duplicates)}",
+            f"Unknown in YouTrack:      {len(self.unknown)}",
+            f"Stale (entry deleted):    {len(self.stale)}",
+            f"Repaired:                 {self.repaired}",
+            f"Fetch:   {self.fetch_seconds:.2f}s"
+            f" ({fetched / max(self.fetch_seconds, 1e-9):.0f} rows/s)",
+            f"Compare: {self.compare_seconds:.2f}s"
+            f" ({fetched / max(self.compare_seconds, 1e-9):.0f} rows/s)",
+            f"Repair:  {self.repair_seconds:.2f}s",
+        ]
+        for title, ids in (
+                ("Missing in YouTrack", self.missing_in_youtrack),
+                ("Untracked in database", self.untracked),
+                ("Duplicates in YouTrack", self.duplicates),
+                ("Unknown in YouTrack", self.unknown),
+                ("Stale", self.stale),
+        ):
+            if ids:
+                lines.append(f"{title}: {', '.join(ids)}")
+        return "\n".join(lines)
+
+
+@dataclass
+class EmployeeSnapshot:
+    # utc days of the range, youtrack work items out of them are fetched
+    # only to check database work items
+    employee_id: int
+    days: tuple[date, date]
+    youtrack_work_items: dict[str, dict]
+    time_entries: dict[str, TimeEntry]
+    work_items: dict[str, WorkItem]
+    members: dict[str, ProjectMember]
+    # clockify entry ids of youtrack work items, which database rows are
+    # outside the range
+    other_work_items: dict[str, str] = field(default_factory=dict)
+
+
+def _youtrack_key(item: dict) -> tuple[str, int]:
+    return item["issue"]["idReadable"], item["duration"]["minutes"]
+
+
+def _youtrack_date(item: dict):
+    return datetime.fromtimestamp(item["date"] / 1000, tz=timezone.utc).date()
+
+
+def _clockify_time(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class CloytReconciler:
+    """Compare work items of youtrack, clockify and the database
+
+    Every source is paged in bulk for the date range, then compared in
+    memory with hash joins:
+
+    * missing in youtrack — database work item, that is not found in
+      youtrack, neither in the range widened by a day on both sides nor
+      by its id.  Repair deletes the row, so the daemon creates the work
+      item again while the entry is in the sync window;
+    * untracked — work item inserted by the daemon, that matches a time
+      entry without database work item (the daemon crashed before the
+      insert).  Repair inserts the missing row;
+    * duplicate — work item inserted by the daemon, that matches a time
+      entry already bound to another work item.  Repair deletes it from
+      youtrack;
+    * unknown — work item inserted by the daemon, that matches no time
+      entry.  Reported only;
+    * stale — database work item, which time entry is deleted in
+      clockify.  Repair deletes it from youtrack and the database.
+
+    """
+
+    def __init__(
+            self,
+            container: Container,
+    ):
+        self.container = container
+        self.config: DaemonConfig = container.get(DaemonConfig)
+
+    def _iter_time_entries(
+            self,
+            tenant: TenantRuntime,
+            employee: Employee,
+            since: datetime,
+            until: datetime,
+    ) -> Iterator[TimeEntry]:
+        page = 1
+        while True:
+            entries = get_time_entries(
+                employee,
+                params={
+                    "start": _clockify_time(since),
+                    "end": _clockify_time(until),
+                    "in-progress": False,
+                    "page": page,
+                    "page-size": CLOCKIFY_PAGE_SIZE,
+                },
+                api_url=tenant.clockify_api_url,
+            )
+            yield from entries
+            if len(entries) < CLOCKIFY_PAGE_SIZE:
+                break
+            page += 1
+
+    def _fetch(
+            self,
+            container: Container,
+            tenant: TenantRuntime,
+            youtrack_client: CloytYouTrackClient,
+            employee: Employee,
+            since: datetime,
+            until: datetime,
+    ) -> EmployeeSnapshot:
+        with container.get(Session) as session:
+            members = {
+                project.short_name: member
+                for member, project in session.execute(
+                    select(ProjectMember, Project)
+                    .join(Project, Project.id == ProjectMember.project_id)
+                    .where(ProjectMember.employee_id == employee.id)
+                )
+            }
+            work_items = {
+                i.youtrack_id: i
+                for i in session.scalars(
+                    select(WorkItem)
+                    .join(ProjectMember,
+                          ProjectMember.id == WorkItem.project_member_id)
+                    .where(ProjectMember.employee_id == employee.id)
+                    .where(func.coalesce(WorkItem.started_at,
+                                         WorkItem.created_at)
+                           .between(to_naive_local(since, self.config.tz),
+                                    to_naive_local(until, self.config.tz)))
+                )
+            }
+
+        youtrack_work_items = {}
+        for short_name in members:
+            for i in youtrack_client.iter_work_items(
+                    start_date=(since - YOUTRACK_DATE_MARGIN).date(),
+                    end_date=(until + YOUTRACK_DATE_MARGIN).date(),
+                    query=f"project: {short_name}",
+            ):
+                youtrack_work_items[i["id"]] = i
+
+        with container.get(Session) as session:
+            other_work_items = dict(session.execute(
+                select(WorkItem.youtrack_id, WorkItem.clockify_time_entry_id)
+                .join(ProjectMember,
+                      ProjectMember.id == WorkItem.project_member_id)
+                .where(ProjectMember.employee_id == employee.id)
+                .where(WorkItem.youtrack_id.in_(
+                    list(youtrack_work_items.keys() - work_items.keys()),
+                ))
+            ).all())
+
+        time_entries = {
+            i.id: i
+            for i in self._iter_time_entries(tenant, employee, since, until)
+        }
+        return EmployeeSnapshot(
+            employee_id=employee.id,
+            days=(since.astimezone(timezone.utc).date(),
+                  until.astimezone(timezone.utc).date()),
+            youtrack_work_items=youtrack_work_items,
+            time_entries=time_entries,
+            work_items=work_items,
+            members=members,
+            other_work_items=other_work_items,
+        )
+
+    def _confirm_missing(
+            self,
+            youtrack_client: CloytYouTrackClient,
+            missing_in_youtrack: list[WorkItem],
+    ) -> list[WorkItem]:
+        """Keep work items, that youtrack does not find by id"""
+
+        confirmed = []
+        for i in missing_in_youtrack:
+            if i.issue_id is None:
+                continue  # created before change detection, can't check
+            try:
+                youtrack_client.get_issue_work_item(
+                    issue_id=i.issue_id,
+                    issue_work_item_id=i.youtrack_id,
+                )
+            except YouTrackNotFound:
+                confirmed.append(i)
+            except YouTrackUnauthorized:
+                raise
+            except YouTrackException as e:
+                logger.warning("Can't check work item with id `%s`,"
+                               " consider it present. Err args: %s",
+                               i.youtrack_id, e.args)
+        return confirmed
+
+    def _compare(
+            self,
+            snapshot: EmployeeSnapshot,
+            report: ReconciliationReport,
+    ) -> tuple[list[WorkItem], list[tuple[dict, TimeEntry]], list[dict],
+               list[WorkItem]]:
+        entries_by_key: dict[tuple[str, int], list[TimeEntry]] = (
+            defaultdict(list)
+        )
+        for entry in snapshot.time_entries.values():
+            parsed_description = parse_issue_id(entry.description)
+            if parsed_description is None:
+                continue
+            key = (parsed_description[1],
+                   work_item_minutes(entry.start, entry.end))
+            entries_by_key[key].append(entry)
+        synced_entry_ids = {
+            i.clockify_time_entry_id for i in snapshot.work_items.values()
+        }
+        synced_entry_ids.update(snapshot.other_work_items.values())
+
+        missing_in_youtrack = [
+            i for youtrack_id, i in snapshot.work_items.items()
+            if i.started_at is not None
+            and youtrack_id not in snapshot.youtrack_work_items
+        ]
+        stale = [
+            i for i in snapshot.work_items.values()
+            if i.started_at is not None
+            and i.clockify_time_entry_id not in snapshot.time_entries
+            and i.youtrack_id in snapshot.youtrack_work_items
+        ]
+
+        untracked: list[tuple[dict, TimeEntry]] = []
+        duplicates: list[dict] = []
+        adopted_entry_ids = set()
+        for youtrack_id, item in snapshot.youtrack_work_items.items():
+            if (youtrack_id in snapshot.work_items
+                    or youtrack_id in snapshot.other_work_items):
+                continue
+            if WORK_ITEM_TEXT_MARK not in (item.get("text") or ""):
+                continue  # work item is not inserted by the daemon
+            item_date = _youtrack_date(item)
+            if not snapshot.days[0] <= item_date <= snapshot.days[1]:
+                continue  # fetched for the date margin only
+            candidates = [
+                i for i in entries_by_key.get(_youtrack_key(item), [])
+                if abs((i.start.astimezone(timezone.utc).date()
+                        - item_date).days) <= 1
+            ]
+            if not candidates:
+                report.unknown.append(youtrack_id)
+                continue
+            entry = next(
+                (i for i in candidates
+                 if i.id not in synced_entry_ids
+                 and i.id not in adopted_entry_ids),
+                None,
+            )
+            if entry is None:
+                duplicates.append(item)
+                continue
+            adopted_entry_ids.add(entry.id)
+            untracked.append((item, entry))
+
+        report.untracked += [item["id"] for item, _ in untracked]
+        report.duplicates += [i["id"] for i in duplicates]
+        report.stale += [i.youtrack_id for i in stale]
+        return missing_in_youtrack, untracked, duplicates, stale
+
+    def _repair(
+            self,
+            container: Container,
+            youtrack_client: CloytYouTrackClient,
+            snapshot: EmployeeSnapshot,
+            missing_in_youtrack: list[WorkItem],
+            untracked: list[tuple[dict, TimeEntry]],
+            duplicates: list[dict],
+            stale: list[WorkItem],
+            report: ReconciliationReport,
+    ):
+        deleted_work_items = list(missing_in_youtrack)
+        for i in duplicates:
+            try:
+                youtrack_client.delete_issue_work_item(
+                    issue_id=i["issue"]["idReadable"],
+                    issue_work_item_id=i["id"],
+                )
+            except YouTrackNotFound:
+                pass
+            except YouTrackUnauthorized:
+                raise
+            except YouTrackException as e:
+                logger.warning("Can't delete duplicated work item with id"
+                               " `%s`. Err args: %s", i["id"], e.args)
+                continue
+            report.repaired += 1
+        for i in stale:
+            try:
+                youtrack_client.delete_issue_work_item(
+                    issue_id=snapshot.youtrack_work_items[i.youtrack_id]
+                    ["issue"]["idReadable"],
+                    issue_work_item_id=i.youtrack_id,
+                )
+            except YouTrackNotFound:
+                pass
+            except YouTrackUnauthorized:
+                raise
+            except YouTrackException as e:
+                logger.warning("Can't delete stale work item with id"
+                               " `%s`. Err args: %s", i.youtrack_id, e.args)
+                continue
+            deleted_work_items.append(i)
+
+        rows = []
+        for item, entry in untracked:
+            member = snapshot.members.get(
+                item["issue"]["project"]["shortName"],
+            )
+            if member is None:
+                logger.warning("Can't adopt work item with id `%s`:"
+                               " employee is not a member of its project",
+                               item["id"])
+                continue
+            rows.append({
+                "project_member_id": member.id,
+                "clockify_time_entry_id": entry.id,
+                "youtrack_id": item["id"],
+                "issue_id": item["issue"]["idReadable"],
+                "fingerprint": time_entry_fingerprint(entry),
+                "started_at": to_naive_local(entry.start, self.config.tz),
+                "duration": entry.end - entry.start,
+                "work_item_type_id": None,
+                "text": item.get("text") or "",
+                "created_at": datetime.now(),
+            })
+
+        with container.get(Session) as session:
+            if deleted_work_items:
+                session.execute(
+                    delete(WorkItem)
+                    .where(WorkItem.id.in_([i.id for i in deleted_work_items]))
+                )
+            for i in deleted_work_items:
+                add_work_item_to_daily_totals(session, i, sign=-1)
+            if deleted_work_items:
+                # the daemon forgets the entries, it knows to be synced
+                session.execute(select(func.pg_notify(
+                    SYNC_NOTIFY_CHANNEL, str(snapshot.employee_id),
+                )))
+            if rows:
+                session.execute(insert(WorkItem), rows)
+            for i in rows:
+                apply_daily_total_delta(
+                    session,
+                    project_member_id=i["project_member_id"],
+                    work_item_type_id=i["work_item_type_id"],
+                    day=i["started_at"].date(),
+                    duration=i["duration"],
+                    sign=1,
+                )
+            session.commit()
+        report.repaired += len(deleted_work_items) + len(rows)
+
+    def reconcile(
+            self,
+            since: datetime,
+            until: datetime,
+            employee_id: int | None = None,
+            repair: bool = False,
+    ) -> ReconciliationReport:
+        report = ReconciliationReport()
+        with self.container() as container:
+            with container.get(Session) as session:
+                stmt = (
+                    select(Employee)
+                    .where(Employee.deleted_at.is_(None))
+                )
+                if employee_id is not None:
+                    stmt = stmt.where(Employee.id == employee_id)
+                employees = list(session.scalars(stmt))
+                tenants = build_tenant_runtimes(
+                    list(session.scalars(select(Tenant))), self.config, {},
+                )
+
+            for employee in employees:
+                logger.info("Reconcile employee id=%s full_name=%s",
+                            employee.id, employee.full_name)
+                tenant = tenants[employee.tenant_id]
+                youtrack_client = build_youtrack_client(tenant, employee)
+
+                started_at = time.monotonic()
+                snapshot = self._fetch(
+                    container, tenant, youtrack_client, employee, since,
+                    until,
+                )
+                report.fetch_seconds += time.monotonic() - started_at
+                report.employees += 1
+                report.youtrack_work_items += len(
+                    snapshot.youtrack_work_items)
+                report.clockify_time_entries += len(snapshot.time_entries)
+                report.database_work_items += len(snapshot.work_items)
+
+                started_at = time.monotonic()
+                missing_in_youtrack, untracked, duplicates, stale = \
+                    self._compare(snapshot, report)
+                report.compare_seconds += time.monotonic() - started_at
+
+                started_at = time.monotonic()
+                missing_in_youtrack = self._confirm_missing(
+                    youtrack_client, missing_in_youtrack,
+                )
+                report.fetch_seconds += time.monotonic() - started_at
+                report.missing_in_youtrack += [i.youtrack_id
+                                               for i in missing_in_youtrack]
+
+                if repair:
+                    started_at = time.monotonic()
+                    self._repair(
+                        container, youtrack_client, snapshot,
+                        missing_in_youtrack, untracked, duplicates, stale,
+                        report,
+                    )
+                    report.repair_seconds += time.monotonic() - started_at
+        for i in tenants.values():
+            i.close()
+        return report
+
+
+def default_since(config: DaemonConfig) -> datetime:
+    return max(
+        config.ignore_entries_before,
+        datetime.now(tz=config.tz) - timedelta(days=30),
+    )
@@ -1,18 +1,24 @@
-import re
+import signal
 import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from logging import getLogger
+from threading import Event
 from typing import Iterable
 
-import requests
-import youtrack_sdk
+import psycopg
 from dishka import Container
-from sqlalchemy import select
+from sqlalchemy import Engine, select, delete, text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
-from clockify_api_client.client import ClockifyAPIClient
-from clockify_api_client import abstract_clockify
 from youtrack_sdk.entities import IssueWorkItem, DurationValue, WorkItemType
-from youtrack_sdk.exceptions import YouTrackException, YouTrackUnauthorized
+from youtrack_sdk.exceptions import (
+    YouTrackException,
+    YouTrackNotFound,
+    YouTrackUnauthorized,
+)
 from requests.exceptions import Timeout
 
 from cloyt.domain.models import (
@@ -21,56 +27,71 @@ from cloyt.domain.models import (
     Project,
     WorkItem,
     WorkItemType as WorkItemTypeModel,
+    SkippedTimeEntry,
+    SkipReason,
+    SyncOutcomeKind,
+    Tenant,
+)
+from cloyt.apps.daemon.daily_totals import add_work_item_to_daily_totals
+from cloyt.apps.daemon.entries import (
+    TimeEntry,
+    get_time_entries,
+    parse_issue_id,
+    time_entry_fingerprint,
+    to_naive_local,
+    work_item_minutes,
+)
+from cloyt.apps.daemon.health import SyncHealth, serve_health
+from cloyt.apps.daemon.journal import (
+    SyncJournal,
+    prune_sync_outcomes,
+    write_sync_journal,
+)
+from cloyt.apps.daemon.notifications import SyncListener
+from cloyt.apps.daemon.tenants import TenantRuntime, build_tenant_runtimes
+from cloyt.apps.daemon.warm_cache import (
+    CatalogProject,
+    load_warm_cache,
+    save_warm_cache,
+    tenant_key,
 )
-from cloyt.infrastructure import DaemonConfig
+from cloyt.apps.daemon.youtrack import CloytYouTrackClient
+from cloyt.apps.maintenance.partitioning import maintain_work_item_partitions
+from cloyt.infrastructure import DaemonConfig, PostgresConfig
 
 
 logger = getLogger(__name__)
 
 
+# longest sleep between checks of the stop request
+STOP_CHECK_SECONDS = 1
 
-CLOCKIFY_TIMEOUT = 10
-
-
-class PatchedAbstractClockify(abstract_clockify.AbstractClockify):
-
-    def get(self, url):
-        logger.debug("Process clockify patched GET request")
-        response = requests.get(
-            url, headers=self.header, timeout=CLOCKIFY_TIMEOUT)
-        if response.status_code in [200, 201, 202]:
-            return response.json()
-        raise Exception(response.json())
 
-    def post(self, url, payload):
-        logger.debug("Process clockify patched POST request")
-        response = requests.post(
-            url, headers=self.header, json=payload, timeout=CLOCKIFY_TIMEOUT)
-        if response.status_code in [200, 201, 202]:
-            return response.json()
-        raise Exception(response.json())
+def build_youtrack_client(
+        tenant: TenantRuntime,
+        employee: Employee,
+) -> CloytYouTrackClient:
+    return CloytYouTrackClient(
+        base_url=tenant.youtrack_base_url,
+        token=employee.youtrack_token,
+        timeout=5,
+        http=tenant.http,
+        limiter=tenant.rate_limiter,
+        response_cache=tenant.response_cache,
+    )
 
-    def put(self, url, payload):
-        logger.debug("Process clockify patched PUT request")
-        response = requests.put(
-            url, headers=self.header, json=payload, timeout=CLOCKIFY_TIMEOUT)
-        if response.status_code in [200, 201, 202]:
-            return response.json()
-        raise Exception(response.json())
 
-    def delete(self, url):
-        logger.debug("Process clockify patched DELETE request")
-        response = requests.delete(
-            url, headers=self.header, timeout=CLOCKIFY_TIMEOUT)
-        if response.status_code in [200, 201, 202, 204]:
-            return response.json()
-        raise Exception(response.json())
-
-
-abstract_clockify.AbstractClockify.get = PatchedAbstractClockify.get
-abstract_clockify.AbstractClockify.post = PatchedAbstractClockify.post
-abstract_clockify.AbstractClockify.put = PatchedAbstractClockify.put
-abstract_clockify.AbstractClockify.delete = PatchedAbstractClockify.delete
+@dataclass
+class PendingPush:
+    time_entry_id: str
+    fingerprint: str
+    issue_id: str
+    issue_work_item: IssueWorkItem
+    project_member_id: int
+    work_item_type_id: int | None
+    started_at: datetime
+    ended_at: datetime
+    duration: timedelta
 
 
 class CloytSynchronizer:
@@ -80,34 +101,83 @@ class CloytSynchronizer:
     ):
         self.container = container
         self.config: DaemonConfig = container.get(DaemonConfig)
+        self._tenants: dict[int | None, TenantRuntime] = {}
+        self.warm = load_warm_cache(self.config)
+        # last journaled outcome of every entry in the sync window
+        self._last_outcomes: dict[int, dict[str, tuple]] = {}
+        # set by SIGTERM, checked between employees and iterations, so
+        # pushed work items are always persisted
+        self.stopping = Event()
+        self.listener = SyncListener(container.get(PostgresConfig))
+        self.health = SyncHealth(self.config)
+
+    def _sync_employee(
+            self,
+            container: Container,
+            employee: Employee,
+            journal: SyncJournal,
+            deadline: float | None = None,
+    ):
+        """Sync the catalog and time entries of the employee
+
+        Sync stops at the deadline (monotonic time) of the employee slice.
+        Interrupted catalog sync resumes from the checkpoint on the next
+        iteration.  Time entries, that are not processed, are fetched
+        again on the next iteration.
+
+        Projects synced less than `catalog_refresh_seconds` ago and entries
+        with known work items are skipped by the warm cache, without
+        requests to youtrack and the database.  Older projects are
+        revalidated and upserted only if their work item types changed.
+
+        """
 
-    def _sync_employee(self, container: Container, employee: Employee):
         config = self.config
-        clockify_client = (
-            ClockifyAPIClient()
-            .build(
-                api_key=employee.clockify_token,
-                api_url="api.clockify.me/v1",
-            )
-        )
-        youtrack_client = youtrack_sdk.client.Client(
-            base_url=config.youtrack_base_url,
-            token=employee.youtrack_token,
-            timeout=5,
-        )
+        tenant = self._tenants[employee.tenant_id]
+        youtrack_client = build_youtrack_client(tenant, employee)
 
         # sync available youtrack projects and memberships
 
-        projects = youtrack_client.get_projects()
+        projects, _ = youtrack_client.get_catalog_projects()
+        projects = sorted(projects, key=lambda x: x.id)
+        checkpoint = self.warm.catalog_checkpoints.get(employee.id)
+        if checkpoint is not None:
+            projects = [i for i in projects if i.id > checkpoint]
+        catalog = self.warm.catalog.setdefault(tenant_key(tenant.id), {})
+        memberships = self.warm.memberships.setdefault(employee.id, set())
+        synced_projects: list[CatalogProject] = []
         with container.get(Session) as session:
-            for i in projects:
+            for n, i in enumerate(projects):
+                # at least one project per slice, so catalog sync progresses
+                if n and self._slice_exhausted(deadline):
+                    self.warm.catalog_checkpoints[employee.id] = (
+                        projects[n - 1].id
+                    )
+                    break
+                cached = catalog.get(i.id)
+                known = (cached is not None
+                         and cached.id in memberships
+                         and cached.name == i.name
+                         and cached.short_name == i.short_name)
+                if (known and time.time() - cached.synced_at
+                        < config.catalog_refresh_seconds):
+                    continue  # project and membership are already synced
+
+                project_item_types, item_types_changed = youtrack_client\
+                    .get_catalog_work_item_types(project_id=i.id)
+                if known and not item_types_changed:
+                    cached.synced_at = time.time()
+                    continue  # nothing to upsert, catalog is revalidated
+
                 stmt = (
                     select(Project)
+                    .where(Project.tenant_id.is_not_distinct_from(tenant.id))
                     .where(Project.youtrack_id == i.id)
                 )
                 project: Project | None = session.scalar(stmt)
                 if project is None:
                     project = Project(
+                        tenant_id=tenant.id,
                         youtrack_id=i.id,
                         name=i.name,
                         short_name=i.short_name,
@@ -118,18 +188,17 @@ class CloytSynchronizer:
                     project.name = i.name
                 session.flush()
 
-                project_item_types = youtrack_client\
-                    .get_project_work_item_types(
-                        project_id=project.youtrack_id,
-                    )
                 for j in project_item_types:
                     stmt = (
                         select(WorkItemTypeModel)
+                        .where(WorkItemTypeModel.tenant_id
+                               .is_not_distinct_from(tenant.id))
                         .where(WorkItemTypeModel.youtrack_id == j.id)
                     )
                     item_type = session.scalar(stmt)
                     if item_type is None:
                         item_type = WorkItemTypeModel(
+                            tenant_id=tenant.id,
                             name=j.name,
                             youtrack_id=j.id,
                             project_id=project.id,
@@ -151,62 +220,153 @@ class CloytSynchronizer:
                     )
                     session.add(project_member)
                     session.flush()
+                synced_projects.append(CatalogProject(
+                    id=project.id,
+                    youtrack_id=project.youtrack_id,
+                    name=project.name,
+                    short_name=project.short_name,
+                    synced_at=time.time(),
+                ))
+            else:
+                self.warm.catalog_checkpoints.pop(employee.id, None)
             session.commit()
+        for i in synced_projects:
+            catalog[i.youtrack_id] = i
+            memberships.add(i.id)
+        if employee.id in self.warm.catalog_checkpoints:
+            logger.info("Slice of employee id=%s is exhausted on projects"
+                        " sync, resume on the next iteration", employee.id)
+            return
 
         # retrieve and process clockify time entries
 
-        entries = clockify_client.time_entries.get_time_entries(
-            workspace_id=employee.clockify_workspace_id,
-            user_id=employee.clockify_user_id,
+        entries = get_time_entries(
+            employee,
             params={
                 "page_size": config.sync_window_size,
                 "start": config.ignore_entries_before.isoformat(),
                 "in-progress": False,
             },
+            api_url=tenant.clockify_api_url,
         )
         sorted_entries = sorted(
             entries,
-            key=lambda x: datetime.fromisoformat(
-                x["timeInterval"]["start"],
-            ),
+            key=lambda x: x.start,
             reverse=True,
         )
         assert sorted_entries == entries
-        for entry in entries:
-            raw_time_interval = entry["timeInterval"]
-            start = datetime.fromisoformat(raw_time_interval["start"])
-            end = datetime.fromisoformat(raw_time_interval["end"])
+        fingerprints = {i.id: time_entry_fingerprint(i) for i in entries}
+        journal.keep_last_outcomes(set(fingerprints))
+        synced_entries = {
+            entry_id: fingerprint
+            for entry_id, fingerprint in self.warm.synced_entries.get(
+                employee.id, {},
+            ).items()
+            if entry_id in fingerprints  # forget entries out of the window
+        }
+        self.warm.synced_entries[employee.id] = synced_entries
+        entry_ids = [
+            i.id for i in entries
+            if synced_entries.get(i.id) != fingerprints[i.id]
+        ]
+        dedupe_horizon = created_after = None
+        if config.work_item_dedupe_horizon_days is not None:
+            dedupe_horizon = datetime.now(tz=config.tz) - timedelta(
+                days=config.work_item_dedupe_horizon_days,
+            )
+            # created_at is naive local time of the server, not of config.tz
+            created_after = datetime.now() - timedelta(
+                days=config.work_item_dedupe_horizon_days,
+            )
+        with container.get(Session) as session:
+            skipped_entries = {
+                i.clockify_time_entry_id: i
+                for i in session.scalars(
+                    select(SkippedTimeEntry)
+                    .where(SkippedTimeEntry.clockify_time_entry_id.in_(
+                        entry_ids,
+                    ))
+                )
+            }
+            stmt = (
+                select(WorkItem)
+                .where(WorkItem.clockify_time_entry_id.in_(entry_ids))
+            )
+            if created_after is not None:
+                # prunes old partitions of partitioned work item table
+                stmt = stmt.where(WorkItem.created_at >= created_after)
+            existing_work_items = {
+                i.clockify_time_entry_id: i
+                for i in session.scalars(stmt)
+            }
+        pending_pushes: list[PendingPush] = []
+        for j, entry in enumerate(entries):
+            if self._slice_exhausted(deadline):
+                logger.info("Slice of employee id=%s is exhausted, %s time"
+                            " entries wait for the next iteration",
+                            employee.id, len(entries) - j)
+                break
+
+            start = entry.start
+            end = entry.end
 
             if (end
                     + timedelta(seconds=config.sync_tolerance_delay_seconds)
                     >= datetime.now(tz=self.config.tz)):
+                journal.record(entry.id, SyncOutcomeKind.TOLERANCE_DELAY)
                 continue  # skip sync tolerant by delay time entries
 
             if start <= config.ignore_entries_before:
+                journal.record(entry.id, SyncOutcomeKind.BEFORE_THRESHOLD)
                 continue  # skip sync tolerant by threshold time entries
 
-            description = entry["description"].strip()
+            if dedupe_horizon is not None and start < dedupe_horizon:
+                continue  # work item may exist beyond the dedupe horizon
 
-            match = re.match(r"(\S+)-(\d+)\s*(.*)\s*", description)
-            if match is None:
-                logger.debug(f"Cannot match issue of entry {entry['id']} "
-                             f"by description")
-                continue
+            fingerprint = fingerprints[entry.id]
+            if synced_entries.get(entry.id) == fingerprint:
+                continue  # work item is known to be created and not changed
 
-            youtrack_project_short_name = match.group(1)
-            youtrack_project_issue_number = match.group(2)
-            issue_id = (f"{youtrack_project_short_name}"
-                        f"-{youtrack_project_issue_number}")
-            time_entry_description = match.group(3)
+            existing_work_item = existing_work_items.get(entry.id)
+            skipped_entry = skipped_entries.get(entry.id)
+            if existing_work_item is not None:
+                if existing_work_item.fingerprint is None:
+                    self._set_baseline_fingerprint(
+                        container, existing_work_item, entry, fingerprint,
+                    )
+                    continue  # work item created before change detection
+                if existing_work_item.fingerprint == fingerprint:
+                    synced_entries[entry.id] = fingerprint
+                    continue  # work item already created and not changed
+                logger.debug("Time entry with id `%s` changed since work"
+                             " item creation", entry.id)
+            elif (skipped_entry is not None
+                    and skipped_entry.content_hash == fingerprint
+                    and (skipped_entry.retry_after is None
+                         or skipped_entry.retry_after > datetime.now())):
+                continue  # skip quarantined time entries
 
-            with container.get(Session) as session:
-                stmt = (
-                    select(WorkItem)
-                    .where(WorkItem.clockify_time_entry_id == entry["id"])
+            description = entry.description.strip()
+
+            parsed_description = parse_issue_id(description)
+            if parsed_description is None:
+                logger.debug("Cannot match issue of entry %s "
+                             "by description", entry.id)
+                if (existing_work_item is not None
+                        and not self._delete_work_item(
+                            container, youtrack_client, existing_work_item,
+                            journal,
+                        )):
+                    continue
+                self._quarantine(
+                    container, journal, employee, entry.id, fingerprint,
+                    skipped_entry, SkipReason.UNMATCHED_DESCRIPTION,
+                    details=description,
                 )
-                existing_work_item: WorkItem | None = session.scalar(stmt)
-                if existing_work_item is not None:
-                    continue  # work item already created
+                continue
+
+            (youtrack_project_short_name, issue_id,
+             time_entry_description) = parsed_description
 
             current_datetime_str = datetime.now(tz=config.tz).strftime(
                 "%Y-%m-%d %H:%M:%S (%z)")
@@ -214,14 +374,27 @@ class CloytSynchronizer:
             with container.get(Session) as session:
                 stmt = (
                     select(Project)
+                    .where(Project.tenant_id.is_not_distinct_from(tenant.id))
                     .where(Project.short_name == youtrack_project_short_name)
                     .order_by(Project.created_at.desc())
                 )
                 project = session.scalar(stmt)
                 if project is None:
-                    logger.debug(f"Cannot match issue of entry {entry['id']} "
-                                 f"by description: project with short name "
-                                 f"{youtrack_project_short_name} does not exists")
+                    logger.debug("Cannot match issue of entry %s "
+                                 "by description: project with short name "
+                                 "%s does not exists",
+                                 entry.id, youtrack_project_short_name)
+                    if (existing_work_item is not None
+                            and not self._delete_work_item(
+                                container, youtrack_client, existing_work_item,
+                                journal,
+                            )):
+                        continue
+                    self._quarantine(
+                        container, journal, employee, entry.id,
+                        fingerprint, skipped_entry, SkipReason.UNKNOWN_PROJECT,
+                        details=youtrack_project_short_name,
+                    )
                     continue
 
                 stmt = (
@@ -232,11 +405,17 @@ class CloytSynchronizer:
                 member: ProjectMember = session.scalar(stmt)
                 if member is None:
                     logger.warning(
-                        f"Time entry id={entry['id']} is matched"
-                        f" to project id={project.id} name={project.name}"
-                        f" short_name={project.short_name}, but employee"
-                        f" id={employee.id} full_name={employee.full_name}"
-                        f" does memberships in the project, so just skip entry"
+                        "Time entry id=%s is matched"
+                        " to project id=%s name=%s"
+                        " short_name=%s, but employee"
+                        " id=%s full_name=%s"
+                        " does memberships in the project, so just skip entry",
+                        entry.id, project.id, project.name,
+                        project.short_name, employee.id, employee.full_name,
+                    )
+                    journal.record(
+                        entry.id, SyncOutcomeKind.MISSING_MEMBERSHIP,
+                        issue_id=issue_id, details=project.short_name,
                     )
                     continue
                 work_item_type = member.default_work_item_type
@@ -245,98 +424,733 @@ class CloytSynchronizer:
                         or project.default_work_item_type
                 )
 
-            # note: you cannot create zero minute work item in youtrack.
-            normalized_minutes = max(
-                round((end - start).total_seconds() / 60),
-                1,
-            )
+            normalized_minutes = work_item_minutes(start, end)
+            action = "Inserted" if existing_work_item is None else "Updated"
             work_item = IssueWorkItem(
                 date=start,
                 duration=DurationValue(
                     minutes=normalized_minutes
                 ),
                 text=(f"**{time_entry_description}**\n\n"
-                      f"Inserted from clockify at {current_datetime_str}"),
+                      f"{action} from clockify at {current_datetime_str}"),
                 work_item_type=
                 work_item_type and WorkItemType(
                     id=work_item_type.youtrack_id,
                 ),
             )
-            try:
-                r = youtrack_client.create_issue_work_item(
-                    issue_id=issue_id,
-                    issue_work_item=work_item,
+            push = PendingPush(
+                time_entry_id=entry.id,
+                fingerprint=fingerprint,
+                issue_id=issue_id,
+                issue_work_item=work_item,
+                project_member_id=member.id,
+                work_item_type_id=work_item_type and work_item_type.id,
+                started_at=to_naive_local(start, config.tz),
+                ended_at=end,
+                duration=end-start,
+            )
+
+            if existing_work_item is None:
+                pending_pushes.append(push)
+            elif existing_work_item.issue_id == issue_id:
+                if not self._update_work_item(
+                        container, youtrack_client, journal,
+                        existing_work_item, push,
+                ):
+                    pending_pushes.append(push)  # deleted in youtrack
+            elif self._delete_work_item(
+                    container, youtrack_client, existing_work_item, journal,
+            ):
+                pending_pushes.append(push)  # time entry moved to issue
+
+        not_pushed = self._push_work_items(
+            container, tenant, youtrack_client, journal, employee,
+            pending_pushes, skipped_entries,
+        )
+        self.health.record_employee_sync(
+            employee.id, [i.ended_at for i in not_pushed],
+        )
+
+    def _push_work_item(
+            self,
+            tenant: TenantRuntime,
+            youtrack_client: CloytYouTrackClient,
+            push: PendingPush,
+    ) -> IssueWorkItem:
+        with tenant.push_slots:
+            return youtrack_client.create_issue_work_item(
+                issue_id=push.issue_id,
+                issue_work_item=push.issue_work_item,
+            )
+
+    def _push_work_items(
+            self,
+            container: Container,
+            tenant: TenantRuntime,
+            youtrack_client: CloytYouTrackClient,
+            journal: SyncJournal,
+            employee: Employee,
+            pending_pushes: list[PendingPush],
+            skipped_entries: dict[str, SkippedTimeEntry],
+    ) -> list[PendingPush]:
+        """Push work items concurrently and persist them as they complete
+
+        Requests are bounded by per-employee and tenant concurrency limits.
+        Results are persisted from the calling thread only, because the
+        request-scoped session must not be shared between threads.  A
+        failed push or save affects only its own entry, which is picked up
+        again on the next iteration.  Unauthorized token cancels pushes,
+        that are not started yet, and is raised after the running ones are
+        persisted.
+
+        Returns pushes, that failed without quarantine of their entries.
+
+        """
+
+        not_pushed: list[PendingPush] = []
+        unauthorized: YouTrackUnauthorized | None = None
+        if not pending_pushes:
+            return not_pushed
+
+        with ThreadPoolExecutor(
+                max_workers=self.config.push_concurrency,
+                thread_name_prefix=f"push-employee-{employee.id}",
+        ) as executor:
+            futures = {
+                executor.submit(
+                    self._push_work_item, tenant, youtrack_client, i,
+                ): i
+                for i in pending_pushes
+            }
+            for future in as_completed(futures):
+                push = futures[future]
+                if future.cancelled():
+                    continue
+                try:
+                    r = future.result()
+                except YouTrackUnauthorized as e:
+                    if unauthorized is None:
+                        unauthorized = e
+                        for i in futures:
+                            i.cancel()
+                    continue
+                except YouTrackException as e:
+                    logger.warning(
+                        "Can't insert issue work item %s"
+                        " to issue `%s`. Err args: %s",
+                        push.issue_work_item, push.issue_id, e.args,
+                    )
+                    self._quarantine(
+                        container, journal, employee, push.time_entry_id,
+                        push.fingerprint,
+                        skipped_entries.get(push.time_entry_id),
+                        SkipReason.YOUTRACK_ERROR,
+                        details=f"{push.issue_id}: {e.args}",
+                    )
+                    continue
+                except Timeout as e:
+                    logger.warning(
+                        "Timeout when inserting work item of time entry"
+                        " with id `%s` to issue `%s`, retry on next"
+                        " iteration: `%s`",
+                        push.time_entry_id, push.issue_id, e,
+                    )
+                    journal.record(
+                        push.time_entry_id, SyncOutcomeKind.TIMEOUT,
+                        issue_id=push.issue_id, details=str(e),
+                    )
+                    not_pushed.append(push)
+                    continue
+                except Exception as e:
+                    logger.exception(
+                        "Unexpected error when inserting work item of"
+                        " time entry with id `%s` to issue `%s`",
+                        push.time_entry_id, push.issue_id,
+                        exc_info=e,
+                    )
+                    journal.record(
+                        push.time_entry_id, SyncOutcomeKind.UNEXPECTED_ERROR,
+                        issue_id=push.issue_id, details=repr(e),
+                    )
+                    not_pushed.append(push)
+                    continue
+                logger.info(
+                    "Time entry with id `%s` upserted to"
+                    " issue `%s` as work item with id `%s`",
+                    push.time_entry_id, push.issue_id, r.id,
                 )
-            except YouTrackException as e:
-                logger.warning(
-                    f"Can't insert issue work item {work_item} to issue"
-                    f"` {issue_id}`. Err args: {e.args}"
+                try:
+                    self._save_work_item(container, push, r, skipped_entries)
+                except Exception as e:
+                    logger.exception(
+                        "Can't save work item with id `%s` of issue `%s`"
+                        " created for time entry with id `%s`",
+                        r.id, push.issue_id, push.time_entry_id,
+                        exc_info=e,
+                    )
+                    journal.record(
+                        push.time_entry_id, SyncOutcomeKind.UNEXPECTED_ERROR,
+                        issue_id=push.issue_id,
+                        details=f"save {r.id}: {e!r}",
+                    )
+                    not_pushed.append(push)
+                    continue
+                journal.record(
+                    push.time_entry_id, SyncOutcomeKind.CREATED,
+                    issue_id=push.issue_id, details=r.id,
                 )
-                continue
+                self.health.record_work_item(employee.id, push.ended_at)
+                self.warm.synced_entries.setdefault(employee.id, {})[
+                    push.time_entry_id
+                ] = push.fingerprint
+        if unauthorized is not None:
+            raise unauthorized
+        return not_pushed
+
+    @staticmethod
+    def _save_work_item(
+            container: Container,
+            push: PendingPush,
+            r: IssueWorkItem,
+            skipped_entries: dict[str, SkippedTimeEntry],
+    ):
+        with container.get(Session) as session:
+            entity = WorkItem(
+                youtrack_id=r.id,
+                clockify_time_entry_id=push.time_entry_id,
+                project_member_id=push.project_member_id,
+                issue_id=push.issue_id,
+                fingerprint=push.fingerprint,
+                started_at=push.started_at,
+                duration=push.duration,
+                text=r.text,
+                work_item_type_id=push.work_item_type_id,
+            )
+            session.add(entity)
+            session.flush()
+            add_work_item_to_daily_totals(session, entity)
+            if push.time_entry_id in skipped_entries:
+                session.execute(
+                    delete(SkippedTimeEntry)
+                    .where(SkippedTimeEntry.clockify_time_entry_id
+                           == push.time_entry_id)
+                )
+            session.flush()
+            session.commit()
+
+    def _set_baseline_fingerprint(
+            self,
+            container: Container,
+            work_item: WorkItem,
+            entry: TimeEntry,
+            fingerprint: str,
+    ):
+        """Remember current entry state of work item created without it"""
+
+        parsed_description = parse_issue_id(entry.description)
+        with container.get(Session) as session:
+            work_item = session.merge(work_item, load=False)
+            add_work_item_to_daily_totals(session, work_item, sign=-1)
+            work_item.fingerprint = fingerprint
+            work_item.started_at = to_naive_local(
+                entry.start, self.config.tz,
+            )
+            if work_item.issue_id is None and parsed_description is not None:
+                work_item.issue_id = parsed_description[1]
+            add_work_item_to_daily_totals(session, work_item)
+            session.commit()
+
+    def _update_work_item(
+            self,
+            container: Container,
+            youtrack_client: CloytYouTrackClient,
+            journal: SyncJournal,
+            work_item: WorkItem,
+            push: PendingPush,
+    ) -> bool:
+        """Propagate entry changes to its work item
+
+        Returns whether the work item still exists.  Work item, that is
+        deleted in youtrack by hand, is deleted from the database as well,
+        so the entry is pushed again instead of failing every iteration.
+
+        """
+
+        try:
+            r = youtrack_client.update_issue_work_item(
+                issue_id=work_item.issue_id,
+                issue_work_item_id=work_item.youtrack_id,
+                issue_work_item=push.issue_work_item,
+            )
+        except YouTrackNotFound:
             logger.info(
-                f"Time entry with id `{entry["id"]}` upserted to"
-                f" issue `{issue_id}` as work item with id `{r.id}`"
+                "Work item with id `%s` of issue `%s` is deleted in"
+                " youtrack, push time entry with id `%s` again",
+                work_item.youtrack_id, work_item.issue_id,
+                push.time_entry_id,
+            )
+            self._delete_work_item_row(container, work_item, journal)
+            return False
+        except YouTrackUnauthorized:
+            raise
+        except YouTrackException as e:
+            logger.warning(
+                "Can't update work item with id `%s`"
+                " of issue `%s`. Err args: %s",
+                work_item.youtrack_id, work_item.issue_id, e.args,
+            )
+            journal.record(
+                push.time_entry_id, SyncOutcomeKind.YOUTRACK_ERROR,
+                issue_id=work_item.issue_id, details=f"update: {e.args}",
+            )
+            return True
+        logger.info(
+            "Time entry with id `%s` changes propagated"
+            " to work item with id `%s` of issue `%s`",
+            push.time_entry_id, work_item.youtrack_id, work_item.issue_id,
+        )
+        with container.get(Session) as session:
+            work_item = session.merge(work_item, load=False)
+            add_work_item_to_daily_totals(session, work_item, sign=-1)
+            work_item.fingerprint = push.fingerprint
+            work_item.started_at = push.started_at
+            work_item.duration = push.duration
+            work_item.text = r["text"]
+            work_item.project_member_id = push.project_member_id
+            work_item.work_item_type_id = push.work_item_type_id
+            add_work_item_to_daily_totals(session, work_item)
+            session.commit()
+        journal.record(
+            push.time_entry_id, SyncOutcomeKind.UPDATED,
+            issue_id=work_item.issue_id, details=work_item.youtrack_id,
+        )
+        return True
+
+    def _delete_work_item(
+            self,
+            container: Container,
+            youtrack_client: CloytYouTrackClient,
+            work_item: WorkItem,
+            journal: SyncJournal,
+    ) -> bool:
+        """Delete work item of the time entry that no longer matches it
+
+        Returns whether the work item is deleted.  Work item, that is
+        already deleted in youtrack, is considered deleted.
+
+        """
+
+        if work_item.issue_id is None:
+            logger.warning(
+                "Can't delete work item with id `%s`"
+                " created before change detection: issue is unknown",
+                work_item.youtrack_id,
+            )
+            return False
+        try:
+            youtrack_client.delete_issue_work_item(
+                issue_id=work_item.issue_id,
+                issue_work_item_id=work_item.youtrack_id,
+            )
+        except YouTrackNotFound:
+            pass
+        except YouTrackUnauthorized:
+            raise
+        except YouTrackException as e:
+            logger.warning(
+                "Can't delete work item with id `%s`"
+                " of issue `%s`. Err args: %s",
+                work_item.youtrack_id, work_item.issue_id, e.args,
+            )
+            journal.record(
+                work_item.clockify_time_entry_id,
+                SyncOutcomeKind.YOUTRACK_ERROR,
+                issue_id=work_item.issue_id, details=f"delete: {e.args}",
             )
+            return False
+        logger.info(
+            "Work item with id `%s` of issue `%s` deleted, because time"
+            " entry with id `%s` no longer matches it",
+            work_item.youtrack_id, work_item.issue_id,
+            work_item.clockify_time_entry_id,
+        )
+        self._delete_work_item_row(container, work_item, journal)
+        return True
+
+    @staticmethod
+    def _delete_work_item_row(
+            container: Container,
+            work_item: WorkItem,
+            journal: SyncJournal,
+    ):
+        with container.get(Session) as session:
+            session.execute(
+                delete(WorkItem)
+                .where(WorkItem.id == work_item.id)
+            )
+            add_work_item_to_daily_totals(session, work_item, sign=-1)
+            session.commit()
+        journal.record(
+            work_item.clockify_time_entry_id, SyncOutcomeKind.DELETED,
+            issue_id=work_item.issue_id, details=work_item.youtrack_id,
+        )
+
+    def _quarantine(
+            self,
+            container: Container,
+            journal: SyncJournal,
+            employee: Employee,
+            time_entry_id: str,
+            fingerprint: str,
+            previous: SkippedTimeEntry | None,
+            reason: SkipReason,
+            details: str | None = None,
+    ):
+        """Skip the time entry until it is edited or retry delay passes
+
+        Unmatched descriptions are skipped until the entry is edited.
+        Other reasons may be resolved upstream, so they are retried with
+        exponential backoff.
+
+        """
+
+        config = self.config
+        attempts = 1
+        if previous is not None and previous.content_hash == fingerprint:
+            attempts = previous.attempts + 1
+
+        if reason == SkipReason.UNMATCHED_DESCRIPTION:
+            retry_after = None
+        else:
+            retry_delay = min(
+                config.skip_retry_base_seconds * 2 ** (attempts - 1),
+                config.skip_retry_max_seconds,
+            )
+            retry_after = datetime.now() + timedelta(seconds=retry_delay)
+
+        values = {
+            "content_hash": fingerprint,
+            "reason": reason,
+            "details": details,
+            "attempts": attempts,
+            "retry_after": retry_after,
+        }
+        with container.get(Session) as session:
+            session.execute(
+                insert(SkippedTimeEntry)
+                .values(
+                    employee_id=employee.id,
+                    clockify_time_entry_id=time_entry_id,
+                    created_at=datetime.now(),
+                    **values,
+                )
+                .on_conflict_do_update(
+                    index_elements=[SkippedTimeEntry.clockify_time_entry_id],
+                    set_=values,
+                )
+            )
+            session.commit()
+        journal.record(
+            time_entry_id, SyncOutcomeKind(reason), details=details,
+        )
+        logger.debug("Time entry with id `%s` quarantined"
+                     " due %s, retry after %s",
+                     time_entry_id, reason, retry_after)
+
+    @staticmethod
+    def _slice_exhausted(deadline: float | None) -> bool:
+        return deadline is not None and time.monotonic() >= deadline
+
+    def _sync_employee_with_retries(
+            self,
+            container: Container,
+            employee: Employee,
+            deadline: float | None = None,
+    ):
+        logger.debug(
+            "Start syncing employee"
+            " id=%s"
+            " full_name=%s",
+            employee.id, employee.full_name,
+        )
+        while True:
+            journal = SyncJournal(
+                employee.id,
+                self._last_outcomes.setdefault(employee.id, {}),
+            )
+            try:
+                self._sync_employee(container, employee, journal, deadline)
+            except YouTrackUnauthorized:
+                logger.error(
+                    "Youtrack client unauthorized for"
+                    " employee id=%s"
+                    " full_name=%s",
+                    employee.id, employee.full_name,
+                )
+                self.health.record_employee_failure(employee.id)
+                break
+            except Timeout as e:
+                if self._slice_exhausted(deadline) or self.stopping.is_set():
+                    logger.warning(
+                        "Stop syncing"
+                        " employee id=%s"
+                        " full_name=%s"
+                        " due timeout error, retry on the next"
+                        " iteration: `%s`.",
+                        employee.id, employee.full_name, e,
+                    )
+                    self.health.record_employee_failure(employee.id)
+                    break
+                logger.warning(
+                    "Retry syncing"
+                    " employee id=%s"
+                    " full_name=%s"
+                    " due timeout error: `%s`.",
+                    employee.id, employee.full_name, e,
+                )
+            except Exception as e:
+                logger.exception(
+                    "Unexpected error when syncing"
+                    " employee id=%s"
+                    " full_name=%s",
+                    employee.id, employee.full_name,
+                    exc_info=e,
+                )
+                # cached state may be the cause, e.g. removed project
+                self.warm.forget_employee(employee.id)
+                self.warm.forget_tenant(employee.tenant_id)
+                self.health.record_employee_failure(employee.id)
+                break
+            else:
+                break
+            finally:
+                self._write_journal(container, journal)
+
+    def _write_journal(self, container: Container, journal: SyncJournal):
+        try:
             with container.get(Session) as session:
-                entity = WorkItem(
-                    youtrack_id=r.id,
-                    clockify_time_entry_id=entry["id"],
-                    project_member_id=member.id,
-                    duration=end-start,
-                    text=r.text,
-                    work_item_type=work_item_type,
+                write_sync_journal(session, journal)
+        except Exception as e:
+            logger.exception("Can't write %s sync outcomes of employee"
+                             " id=%s", len(journal.rows),
+                             journal.employee_id, exc_info=e)
+
+    def _refresh_tenants(self, session: Session):
+        active_tenant_ids = set(session.scalars(
+            select(Employee.tenant_id)
+            .where(Employee.deleted_at.is_(None))
+            .distinct()
+        ))
+        self._tenants = build_tenant_runtimes(
+            list(session.scalars(select(Tenant))),
+            self.config,
+            self._tenants,
+            active_tenant_ids,
+        )
+
+    def _sync_employees(
+            self,
+            container: Container,
+            tenant: TenantRuntime,
+            employees: list[Employee],
+    ):
+        """Sync employees round-robin within the iteration budget
+
+        Each employee gets an equal share of the remaining budget, so time
+        left by fast employees goes to the next ones.  The first employee
+        rotates every iteration, so the employees at the end of the list
+        are not the ones that always get the shortest slices.
+
+        """
+
+        config = self.config
+        offsets = self.warm.round_robin_offsets
+        offset = offsets.get(tenant_key(tenant.id), 0) % len(employees)
+        offsets[tenant_key(tenant.id)] = offset + 1
+        employees = employees[offset:] + employees[:offset]
+
+        budget_deadline = None
+        if config.iteration_budget_seconds is not None:
+            budget_deadline = (time.monotonic()
+                               + config.iteration_budget_seconds)
+        for j, employee in enumerate(employees):
+            if self.stopping.is_set():
+                break
+            deadline = None
+            if budget_deadline is not None:
+                employee_slice = max(
+                    (budget_deadline - time.monotonic())
+                    / (len(employees) - j),
+                    config.employee_slice_min_seconds,
                 )
-                session.add(entity)
-                session.flush()
-                session.commit()
+                deadline = time.monotonic() + employee_slice
+            self._sync_employee_with_retries(container, employee, deadline)
+
+    def _sync_tenant(self, tenant: TenantRuntime, employees: list[Employee]):
+        """Sync employees of the tenant in the own request container"""
+
+        logger.debug("Start syncing %s employees of tenant %s",
+                     len(employees), tenant.name)
+        with self.container() as request_container:
+            self._sync_employees(request_container, tenant, employees)
+
+    def _check_work_item_deletions(self, session: Session):
+        """Forget synced entries, if any work item row was deleted
+
+        Rows may be deleted by reconciliation repair or in the admin, so
+        their entries must be pushed again.  Deletions are counted by
+        postgres statistics over all partitions, that is cheap, but does
+        not tell which rows are deleted, so all synced entries are
+        forgotten.  Statistics reset is handled as deletion as well.
+
+        """
+
+        deletions = session.scalar(text(
+            "SELECT coalesce(sum(n_tup_del), 0) FROM pg_stat_user_tables"
+            " WHERE relid IN"
+            " (SELECT relid FROM pg_partition_tree('work_item'))"
+        ))
+        if deletions != self.warm.work_item_deletions:
+            if self.warm.synced_entries:
+                logger.info("Work items were deleted, forget synced"
+                            " entries of the warm cache")
+            self.warm.synced_entries.clear()
+            self.warm.work_item_deletions = deletions
 
     def _iteration(self, container: Container):
+        """Sync all employees, tenants in parallel
+
+        Every tenant syncs its employees in its own thread, so a slow or
+        throttled youtrack instance delays its own employees only.
+
+        """
+
+        self.health.start_iteration()
         with container.get(Session) as session:
+            self._refresh_tenants(session)
+            self._check_work_item_deletions(session)
             employees: Iterable[Employee] = session.scalars(
                 select(Employee)
-                .where(Employee.deleted_at.is_(None)),
+                .where(Employee.deleted_at.is_(None))
+                .order_by(Employee.id),
+            )
+            employees_by_tenant: dict[int | None, list[Employee]] = (
+                defaultdict(list)
             )
             for i in employees:
-                logger.debug(
-                    f"Start syncing employee"
-                    f" id={i.id}"
-                    f" full_name={i.full_name}"
+                employees_by_tenant[i.tenant_id].append(i)
+        self.health.track_employees({
+            j.id for i in employees_by_tenant.values() for j in i
+        })
+
+        if len(employees_by_tenant) == 1:
+            [(tenant_id, employees)] = employees_by_tenant.items()
+            self._sync_employees(
+                container, self._tenants[tenant_id], employees,
+            )
+        elif employees_by_tenant:
+            with ThreadPoolExecutor(
+                    max_workers=len(employees_by_tenant),
+                    thread_name_prefix="sync-tenant",
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        self._sync_tenant, self._tenants[tenant_id], i,
+                    )
+                    for tenant_id, i in employees_by_tenant.items()
+                ]
+                for i in as_completed(futures):
+                    i.result()
+        self.health.finish_iteration()
+
+    def _sync_notified_employees(self, employee_ids: set[int]):
+        with self.container() as request_container:
+            with request_container.get(Session) as session:
+                self._refresh_tenants(session)
+                employees = list(session.scalars(
+                    select(Employee)
+                    .where(Employee.deleted_at.is_(None))
+                    .where(Employee.id.in_(employee_ids)),
+                ))
+            for i in employees:
+                if self.stopping.is_set():
+                    break
+                logger.info("Sync employee id=%s full_name=%s on"
+                            " notification", i.id, i.full_name)
+                # the admin may have changed memberships or work items
+                self.warm.forget_employee(i.id)
+                self._sync_employee_with_retries(request_container, i)
+
+    def _wait(self, delay: float):
+        """Sleep for the delay, syncing notified employees meanwhile"""
+
+        deadline = time.monotonic() + delay
+        while ((remaining := deadline - time.monotonic()) > 0
+               and not self.stopping.is_set()):
+            if not self.listener.ensure_listening():
+                self.stopping.wait(min(remaining, STOP_CHECK_SECONDS))
+                continue
+            try:
+                employee_ids = self.listener.wait(
+                    min(remaining, STOP_CHECK_SECONDS),
                 )
-                while True:
-                    try:
-                        self._sync_employee(container, i)
-                    except YouTrackUnauthorized:
-                        logger.error(
-                            f"Youtrack client unauthorized for"
-                            f" employee id={i.id}"
-                            f" full_name={i.full_name}"
-                        )
-                        break
-                    except Exception as e:
-                        logger.exception(
-                            "Unexpected error when syncing"
-                             f" employee id={i.id}"
-                             f" full_name={i.full_name}",
-                             exc_info=e,
-                        )
-                        break
-                    except Timeout as e:
-                        logger.warning(
-                            f"Retry syncing"
-                            f" employee id={i.id}"
-                            f" full_name={i.full_name}"
-                            f" due timeout error: `{e}`."
-                        )
-                    else:
-                        break
+            except psycopg.Error as e:
+                self.listener.disconnect(e)
+                continue
+            if employee_ids:
+                self._sync_notified_employees(employee_ids)
+
+    def _maintain_partitions(self, container: Container):
+        try:
+            with container.get(Engine).begin() as connection:
+                maintain_work_item_partitions(connection, self.config)
+        except Exception as e:
+            logger.exception("Work item partitions maintenance failed",
+                             exc_info=e)
+
+    def _prune_sync_outcomes(self, container: Container):
+        try:
+            with container.get(Session) as session:
+                pruned = prune_sync_outcomes(
+                    session, self.config.sync_outcome_retention_days,
+                )
+        except Exception as e:
+            logger.exception("Sync outcomes pruning failed", exc_info=e)
+            return
+        if pruned:
+            logger.info("Pruned %s sync outcomes", pruned)
 
     def run(self):
+        """Run sync iterations until the daemon is stopped
+
+        SIGTERM stops the daemon after the employees being synced, then
+        warm cache is saved.
+
+        """
+
+        signal.signal(signal.SIGTERM, self._request_stop)
+        try:
+            self._run()
+        finally:
+            save_warm_cache(self.config, self.warm)
+
+    def _request_stop(self, signum, frame):
+        logger.info("Stop requested, finish syncing employees in progress")
+        self.stopping.set()
+
+    def _run(self):
         config = self.config
+        if config.health_port is not None:
+            serve_health(self.health, config.health_port)
 
-        while True:
+        self.listener.ensure_listening()
+
+        while not self.stopping.is_set():
             logger.debug("Start next sync iteration")
             starts_at = datetime.now()
             with self.container() as request_container:
+                self._maintain_partitions(request_container)
+                self._prune_sync_outcomes(request_container)
                 self._iteration(request_container)
             ends_at = datetime.now()
 
@@ -344,8 +1158,8 @@ class CloytSynchronizer:
             delay = config.sync_throttling_delay_seconds - total_seconds
 
             if delay > 0:
-                logger.debug(f"Enter {delay}s delay")
-                time.sleep(delay)
-                logger.debug(f"Exit delay")
+                logger.debug("Enter %ss delay", delay)
+                self._wait(delay)
+                logger.debug("Exit delay")
             else:
-                logger.warning(f"Continue without delay (delay={delay})")
+                logger.warning("Continue without delay (delay=%s)", delay)
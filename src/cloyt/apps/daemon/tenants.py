@@ -0,0 +1,158 @@
+import time
+from dataclasses import dataclass
+from logging import getLogger
+from threading import BoundedSemaphore, Lock
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cloyt.apps.daemon.entries import CLOCKIFY_API_URL
+from cloyt.apps.daemon.http_cache import ResponseCache
+from cloyt.domain.models import Tenant
+from cloyt.infrastructure import DaemonConfig
+
+
+logger = getLogger(__name__)
+
+
+class RateLimiter:
+    """Token bucket shared by the threads of one tenant
+
+    Allows bursts up to one second of requests.  Without rate, does not
+    limit at all.
+
+    """
+
+    def __init__(self, rate: float | None):
+        self.rate = rate
+        self.tokens = rate or 0
+        self.updated_at = time.monotonic()
+        self.lock = Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.tokens + (now - self.updated_at) * self.rate,
+                    max(self.rate, 1),
+                )
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+@dataclass
+class TenantRuntime:
+    """Connection pool, response cache and limits of the tenant"""
+
+    id: int | None
+    name: str
+    youtrack_base_url: str
+    clockify_api_url: str
+    push_concurrency: int
+    requests_per_second: float | None
+    push_slots: BoundedSemaphore
+    rate_limiter: RateLimiter
+    http: requests.Session
+    response_cache: ResponseCache
+
+    @classmethod
+    def build(
+            cls,
+            *,
+            id: int | None,
+            name: str,
+            youtrack_base_url: str,
+            clockify_api_url: str,
+            push_concurrency: int,
+            requests_per_second: float | None,
+    ) -> "TenantRuntime":
+        http = requests.Session()
+        adapter = HTTPAdapter(
+            pool_maxsize=max(push_concurrency, 1),
+        )
+        http.mount("https://", adapter)
+        http.mount("http://", adapter)
+        return cls(
+            id=id,
+            name=name,
+            youtrack_base_url=youtrack_base_url,
+            clockify_api_url=clockify_api_url,
+            push_concurrency=push_concurrency,
+            requests_per_second=requests_per_second,
+            push_slots=BoundedSemaphore(push_concurrency),
+            rate_limiter=RateLimiter(requests_per_second),
+            http=http,
+            response_cache=ResponseCache(),
+        )
+
+    def close(self):
+        self.http.close()
+
+
+def build_tenant_runtimes(
+        tenants: list[Tenant],
+        config: DaemonConfig,
+        previous: dict[int | None, TenantRuntime],
+        active_tenant_ids: set[int | None] | None = None,
+) -> dict[int | None, TenantRuntime]:
+    """Build runtimes of the default tenant and the configured ones
+
+    The global push budget is shared equally between active tenants, the
+    ones with employees, so a throttled tenant holds its own slots only
+    and idle tenants take none.  Without active tenants given, all of
+    them are considered active.  Runtimes with unchanged settings are
+    kept, so their connection pools survive iterations.
+
+    """
+
+    if active_tenant_ids is None:
+        active_tenants = len(tenants) + 1
+    else:
+        active_tenants = len(active_tenant_ids)
+    fair_share = max(
+        config.push_concurrency_global // max(active_tenants, 1), 1,
+    )
+    settings = [
+        {
+            "id": None,
+            "name": "default",
+            "youtrack_base_url": config.youtrack_base_url,
+            "clockify_api_url": CLOCKIFY_API_URL,
+            "push_concurrency": fair_share,
+            "requests_per_second": config.youtrack_requests_per_second,
+        },
+    ]
+    for i in tenants:
+        settings.append({
+            "id": i.id,
+            "name": i.name,
+            "youtrack_base_url": i.youtrack_base_url,
+            "clockify_api_url": i.clockify_api_url or CLOCKIFY_API_URL,
+            "push_concurrency": min(i.push_concurrency or fair_share,
+                                    fair_share),
+            "requests_per_second": i.requests_per_second,
+        })
+
+    result = {}
+    for i in settings:
+        kept = previous.get(i["id"])
+        if kept is not None and all(
+                getattr(kept, name) == value for name, value in i.items()
+        ):
+            result[i["id"]] = kept
+            continue
+        if kept is not None:
+            logger.info("Settings of tenant %s changed", i["name"])
+            kept.close()
+        result[i["id"]] = TenantRuntime.build(**i)
+    for tenant_id, i in previous.items():
+        if tenant_id not in result:
+            i.close()
+    return result
@@ -0,0 +1,129 @@
+import os
+import time
+from logging import getLogger
+
+import msgspec
+
+from cloyt.infrastructure import DaemonConfig
+
+
+logger = getLogger(__name__)
+
+
+# bump on every incompatible change of the snapshot structs
+WARM_CACHE_VERSION = 1
+
+# key of the default tenant, json object keys cannot be null
+DEFAULT_TENANT_KEY = 0
+
+
+def tenant_key(tenant_id: int | None) -> int:
+    return DEFAULT_TENANT_KEY if tenant_id is None else tenant_id
+
+
+class CatalogProject(msgspec.Struct):
+    """Project of the youtrack catalog, that is already in the database"""
+
+    id: int
+    youtrack_id: str
+    name: str
+    short_name: str
+    # unix time of the last upsert or revalidation of the project
+    synced_at: float
+
+
+class WarmCache(msgspec.Struct):
+    """State of the daemon worth keeping across restarts
+
+    Catalog is keyed by tenant and youtrack project id.  Memberships hold
+    database ids of projects, which employee is known to be a member of.
+    Synced entries map clockify time entry id to the fingerprint of its
+    work item; they are valid while the number of rows deleted from
+    `work_item` stays the same.  Catalog checkpoints and round-robin
+    offsets are the cursors of the iteration budget.
+
+    """
+
+    version: int = WARM_CACHE_VERSION
+    saved_at: float = 0
+    catalog: dict[int, dict[str, CatalogProject]] = msgspec.field(
+        default_factory=dict,
+    )
+    memberships: dict[int, set[int]] = msgspec.field(default_factory=dict)
+    synced_entries: dict[int, dict[str, str]] = msgspec.field(
+        default_factory=dict,
+    )
+    catalog_checkpoints: dict[int, str] = msgspec.field(default_factory=dict)
+    round_robin_offsets: dict[int, int] = msgspec.field(
+        default_factory=dict,
+    )
+    # deleted work items by postgres statistics, when synced entries were
+    # last known to be valid
+    work_item_deletions: int | None = None
+
+    def forget_employee(self, employee_id: int):
+        self.memberships.pop(employee_id, None)
+        self.synced_entries.pop(employee_id, None)
+        self.catalog_checkpoints.pop(employee_id, None)
+
+    def forget_tenant(self, tenant_id: int | None):
+        self.catalog.pop(tenant_key(tenant_id), None)
+
+
+WARM_CACHE_DECODER = msgspec.json.Decoder(WarmCache)
+
+
+def load_warm_cache(config: DaemonConfig) -> WarmCache:
+    """Load the snapshot, or return empty cache if it is not usable
+
+    Snapshot of another version, older than the max age or broken is
+    ignored, so the daemon starts cold as it did without it.
+
+    """
+
+    path = config.warm_cache_path
+    if path is None:
+        return WarmCache()
+    try:
+        with open(path, "rb") as f:
+            cache = WARM_CACHE_DECODER.decode(f.read())
+    except FileNotFoundError:
+        logger.info("Warm cache snapshot %s not found, start cold", path)
+        return WarmCache()
+    except (OSError, msgspec.DecodeError) as e:
+        logger.warning("Can't load warm cache snapshot %s, start cold:"
+                       " `%s`", path, e)
+        return WarmCache()
+
+    age = time.time() - cache.saved_at
+    if cache.version != WARM_CACHE_VERSION:
+        logger.info("Warm cache snapshot version %s is not %s, start cold",
+                    cache.version, WARM_CACHE_VERSION)
+        return WarmCache()
+    if age > config.warm_cache_max_age_seconds:
+        logger.info("Warm cache snapshot is %.0fs old, start cold", age)
+        return WarmCache()
+    logger.info("Loaded warm cache snapshot saved %.0fs ago: %s projects,"
+                " %s employees", age,
+                sum(len(i) for i in cache.catalog.values()),
+                len(cache.synced_entries))
+    return cache
+
+
+def save_warm_cache(config: DaemonConfig, cache: WarmCache):
+    """Write the snapshot atomically, so a crash keeps the previous one"""
+
+    path = config.warm_cache_path
+    if path is None:
+        return
+    cache.version = WARM_CACHE_VERSION
+    cache.saved_at = time.time()
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(msgspec.json.encode(cache))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("Can't save warm cache snapshot %s: `%s`", path, e)
+        return
+    logger.info("Saved warm cache snapshot %s", path)
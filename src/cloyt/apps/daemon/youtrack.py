@@ -0,0 +1,273 @@
+from datetime import date
+from typing import Any, Iterator, Protocol
+
+import msgspec
+import requests
+import youtrack_sdk
+from youtrack_sdk.entities import IssueWorkItem
+from youtrack_sdk.exceptions import (
+    YouTrackException,
+    YouTrackNotFound,
+    YouTrackUnauthorized,
+)
+
+from cloyt.apps.daemon.http_cache import (
+    CachedResponse,
+    ResponseCache,
+    content_hash,
+    token_scope,
+)
+
+
+class RequestLimiter(Protocol):
+    def acquire(self): ...
+
+
+class YouTrackProject(msgspec.Struct, rename="camel"):
+    id: str
+    name: str
+    short_name: str
+
+
+class YouTrackWorkItemType(msgspec.Struct):
+    id: str
+    name: str
+
+
+PROJECTS_DECODER = msgspec.json.Decoder(list[YouTrackProject])
+
+WORK_ITEM_TYPES_DECODER = msgspec.json.Decoder(list[YouTrackWorkItemType])
+
+
+class CloytYouTrackClient(youtrack_sdk.client.Client):
+    """YouTrack client with the endpoints missing in `youtrack_sdk`
+
+    Extra endpoints are requested through a separate HTTP session, so the
+    client does not depend on `youtrack_sdk` internals.  The session may
+    be shared by clients of the same instance, so the token is sent with
+    every request.  Every request, including the ones of `youtrack_sdk`
+    methods used by the daemon, waits for the limiter.
+
+    Catalog endpoints are revalidated against the response cache, when it
+    is given, and report whether the response changed since the previous
+    request of the same token.
+
+    """
+
+    def __init__(
+            self,
+            *,
+            base_url: str,
+            token: str,
+            timeout: int | None = None,
+            http: requests.Session | None = None,
+            limiter: RequestLimiter | None = None,
+            response_cache: ResponseCache | None = None,
+    ):
+        super().__init__(base_url=base_url, token=token, timeout=timeout)
+        self.api_url = f"{base_url.rstrip('/')}/api"
+        self.timeout = timeout
+        self.http = http or requests.Session()
+        self.headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/json",
+        }
+        self.limiter = limiter
+        self.response_cache = response_cache
+        self.cache_scope = token_scope(token)
+
+    def _acquire(self):
+        if self.limiter is not None:
+            self.limiter.acquire()
+
+    def create_issue_work_item(self, *args, **kwargs):
+        self._acquire()
+        return super().create_issue_work_item(*args, **kwargs)
+
+    def _request(
+            self,
+            method: str,
+            path: str,
+            params: dict | None = None,
+            json: Any = None,
+    ) -> Any:
+        self._acquire()
+        response = self.http.request(
+            method,
+            f"{self.api_url}{path}",
+            params=params,
+            json=json,
+            headers=self.headers,
+            timeout=self.timeout,
+        )
+        self._raise_for_status(response)
+        if not response.content:
+            return None
+        return response.json()
+
+    @staticmethod
+    def _raise_for_status(response: requests.Response):
+        if response.status_code == 401:
+            raise YouTrackUnauthorized(response.text)
+        if response.status_code == 404:
+            raise YouTrackNotFound(response.text)
+        if not response.ok:
+            raise YouTrackException(response.status_code, response.text)
+
+    def _cached_get(
+            self,
+            path: str,
+            params: dict,
+            decoder: msgspec.json.Decoder,
+    ) -> tuple[Any, bool]:
+        """Return decoded response and whether it changed since cached
+
+        Sends validators of the cached response, so unchanged one may come
+        back as 304 without body.  Otherwise the content hash is compared.
+        Without cache, every response is considered changed.
+
+        """
+
+        key = None
+        cached = None
+        headers = self.headers
+        if self.response_cache is not None:
+            key = self.response_cache.key(self.cache_scope, path, params)
+            cached = self.response_cache.get(key)
+        if cached is not None:
+            headers = dict(headers)
+            if cached.etag is not None:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified is not None:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        self._acquire()
+        response = self.http.get(
+            f"{self.api_url}{path}",
+            params=params,
+            headers=headers,
+            timeout=self.timeout,
+        )
+        if cached is not None and response.status_code == 304:
+            return cached.body, False
+        self._raise_for_status(response)
+
+        digest = content_hash(response.content)
+        changed = cached is None or cached.content_hash != digest
+        body = decoder.decode(response.content) if changed else cached.body
+        if key is not None:
+            self.response_cache.put(key, CachedResponse(
+                content_hash=digest,
+                body=body,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            ))
+        return body, changed
+
+    def get_catalog_projects(self) -> tuple[list[YouTrackProject], bool]:
+        """Return projects visible to the token and whether they changed"""
+
+        return self._cached_get(
+            "/admin/projects",
+            {"fields": "id,name,shortName", "$top": -1},
+            PROJECTS_DECODER,
+        )
+
+    def get_catalog_work_item_types(
+            self,
+            project_id: str,
+    ) -> tuple[list[YouTrackWorkItemType], bool]:
+        return self._cached_get(
+            f"/admin/projects/{project_id}/timeTrackingSettings"
+            f"/workItemTypes",
+            {"fields": "id,name", "$top": -1},
+            WORK_ITEM_TYPES_DECODER,
+        )
+
+    def get_me(self) -> dict:
+        return self._request(
+            "GET",
+            "/users/me",
+            params={"fields": "id,login,name"},
+        )
+
+    def get_issue_work_item(
+            self,
+            *,
+            issue_id: str,
+            issue_work_item_id: str,
+    ) -> dict:
+        return self._request(
+            "GET",
+            f"/issues/{issue_id}/timeTracking/workItems/{issue_work_item_id}",
+            params={"fields": "id"},
+        )
+
+    @staticmethod
+    def _dump_work_item(issue_work_item: IssueWorkItem) -> dict:
+        data = {
+            "date": int(issue_work_item.date.timestamp() * 1000),
+            "duration": {"minutes": issue_work_item.duration.minutes},
+            "text": issue_work_item.text,
+        }
+        if issue_work_item.work_item_type is not None:
+            data["type"] = {"id": issue_work_item.work_item_type.id}
+        return data
+
+    def update_issue_work_item(
+            self,
+            *,
+            issue_id: str,
+            issue_work_item_id: str,
+            issue_work_item: IssueWorkItem,
+    ) -> dict:
+        return self._request(
+            "POST",
+            f"/issues/{issue_id}/timeTracking/workItems/{issue_work_item_id}",
+            params={"fields": "id,text"},
+            json=self._dump_work_item(issue_work_item),
+        )
+
+    def delete_issue_work_item(
+            self,
+            *,
+            issue_id: str,
+            issue_work_item_id: str,
+    ) -> None:
+        self._request(
+            "DELETE",
+            f"/issues/{issue_id}/timeTracking/workItems/{issue_work_item_id}",
+        )
+
+    def iter_work_items(
+            self,
+            *,
+            start_date: date,
+            end_date: date,
+            query: str | None = None,
+            author: str = "me",
+            page_size: int = 500,
+    ) -> Iterator[dict]:
+        """Iterate over work items of the author page by page"""
+
+        params = {
+            "fields": "id,date,duration(minutes),text,"
+                      "issue(idReadable,project(id,shortName))",
+            "author": author,
+            "startDate": start_date.isoformat(),
+            "endDate": end_date.isoformat(),
+            "$top": page_size,
+        }
+        if query is not None:
+            params["query"] = query
+        skip = 0
+        while True:
+            page = self._request(
+                "GET",
+                "/workItems",
+                params={**params, "$skip": skip},
+            )
+            yield from page
+            if len(page) < page_size:
+                break
+            skip += page_size
@@ -0,0 +1,112 @@
+import statistics
+import time
+from dataclasses import dataclass
+
+import requests
+from sqladmin import ModelView
+from sqlalchemy import Engine, inspect, select
+
+from cloyt.apps.admin.views import MODEL_VIEWS
+from cloyt.infrastructure import AdminConfig
+
+
+ADMIN_TIMEOUT = 120
+
+
+@dataclass
+class PageBenchmark:
+    view: str
+    page: str
+    status: int
+    median_ms: float
+    max_ms: float
+
+
+def _latest_pk(engine: Engine, view: type[ModelView]) -> str | None:
+    """Identifier of the latest row of the view model, as in admin URLs"""
+
+    pk_columns = inspect(view.model).primary_key
+    with engine.connect() as connection:
+        row = connection.execute(
+            select(*pk_columns)
+            .order_by(*(i.desc() for i in pk_columns))
+            .limit(1)
+        ).first()
+    if row is None:
+        return None
+    return ";".join(str(i) for i in row)
+
+
+def _measure(
+        http: requests.Session,
+        view: str,
+        page: str,
+        url: str,
+        rounds: int,
+) -> PageBenchmark:
+    timings = []
+    status = 0
+    for _ in range(rounds):
+        started_at = time.perf_counter()
+        response = http.get(url, timeout=ADMIN_TIMEOUT)
+        timings.append((time.perf_counter() - started_at) * 1000)
+        status = response.status_code
+    return PageBenchmark(
+        view=view,
+        page=page,
+        status=status,
+        median_ms=statistics.median(timings),
+        max_ms=max(timings),
+    )
+
+
+def benchmark_admin_views(
+        engine: Engine,
+        config: AdminConfig,
+        admin_url: str,
+        rounds: int = 5,
+) -> list[PageBenchmark]:
+    """Time list and detail pages of every model view of running admin
+
+    Logs in with the configured credentials, then requests the first list
+    page and the detail page of the latest row of every view.  Run it
+    against a database filled by the `seed` command to see how the admin
+    behaves at production scale.
+
+    """
+
+    admin_url = admin_url.rstrip("/")
+    results = []
+    with requests.Session() as http:
+        response = http.post(
+            f"{admin_url}/login",
+            data={"username": config.username, "password": config.password},
+            timeout=ADMIN_TIMEOUT,
+        )
+        response.raise_for_status()
+        if response.url.rstrip("/").endswith("/login"):
+            raise RuntimeError("Admin login failed")
+
+        for i in MODEL_VIEWS:
+            results.append(_measure(
+                http, i.identity, "list",
+                f"{admin_url}/{i.identity}/list", rounds,
+            ))
+            pk = _latest_pk(engine, i)
+            if pk is not None:
+                results.append(_measure(
+                    http, i.identity, "details",
+                    f"{admin_url}/{i.identity}/details/{pk}", rounds,
+                ))
+    return results
+
+
+def format_admin_benchmarks(benchmarks: list[PageBenchmark]) -> str:
+    lines = [f"{'view':<24}{'page':<10}{'status':>8}{'median ms':>12}"
+             f"{'max ms':>12}"]
+    for i in benchmarks:
+        lines.append(
+            f"{i.view:<24}{i.page:<10}{i.status:>8}{i.median_ms:>12.1f}"
+            f"{i.max_ms:>12.1f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,148 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import Connection, Engine, Select, select, func, text
+
+from cloyt.domain.models import Project, ProjectMember, WorkItem
+
+
+# indexes of the sync hot queries, dropped to measure plans without them
+HOT_QUERY_INDEXES = [
+    "ix_project_short_name",
+    "ix_project_member_employee_id_project_id",
+    "ix_work_item_project_member_id",
+    "ix_work_item_created_at_id",
+]
+
+
+@dataclass
+class QueryPlan:
+    planning_ms: float
+    execution_ms: float
+    node: str
+
+
+@dataclass
+class QueryBenchmark:
+    name: str
+    without_indexes: QueryPlan | None = None
+    with_indexes: QueryPlan | None = None
+
+
+def _hot_queries(connection: Connection) -> dict[str, Select]:
+    """Queries of the daemon and the admin with sample parameters"""
+
+    member = connection.execute(
+        select(ProjectMember.id, ProjectMember.employee_id,
+               ProjectMember.project_id)
+        .order_by(func.random())
+        .limit(1)
+    ).one()
+    short_name = connection.scalar(
+        select(Project.short_name)
+        .where(Project.id == member.project_id)
+    )
+    entry_ids = list(connection.scalars(
+        select(WorkItem.clockify_time_entry_id)
+        .order_by(func.random())
+        .limit(50)
+    ))
+    now = datetime.now()
+    return {
+        "project by short name": (
+            select(Project)
+            .where(Project.short_name == short_name)
+            .order_by(Project.created_at.desc())
+        ),
+        "membership of employee in project": (
+            select(ProjectMember)
+            .where(ProjectMember.employee_id == member.employee_id)
+            .where(ProjectMember.project_id == member.project_id)
+        ),
+        "work items of sync window": (
+            select(WorkItem)
+            .where(WorkItem.clockify_time_entry_id.in_(entry_ids))
+        ),
+        "work items of membership": (
+            select(WorkItem)
+            .where(WorkItem.project_member_id == member.id)
+        ),
+        "work items created last day": (
+            select(WorkItem)
+            .where(WorkItem.created_at >= now - timedelta(days=1))
+        ),
+        "latest work items page": (
+            select(WorkItem)
+            .order_by(WorkItem.created_at.desc())
+            .limit(50)
+        ),
+    }
+
+
+def _explain(connection: Connection, stmt: Select) -> QueryPlan:
+    compiled = stmt.compile(
+        dialect=connection.dialect,
+        compile_kwargs={"render_postcompile": True},
+    )
+    [[[result]]] = connection.exec_driver_sql(
+        f"EXPLAIN (ANALYZE, FORMAT JSON) {compiled}",
+        compiled.params,
+    ).all()
+    return QueryPlan(
+        planning_ms=result["Planning Time"],
+        execution_ms=result["Execution Time"],
+        node=result["Plan"]["Node Type"],
+    )
+
+
+def benchmark_hot_queries(
+        engine: Engine,
+        compare: bool = True,
+) -> list[QueryBenchmark]:
+    """Capture EXPLAIN ANALYZE timings of the sync hot queries
+
+    When `compare` is set, the queries are explained once more after
+    dropping the hot query indexes in a transaction, that is rolled back.
+    Dropping takes exclusive locks on the tables, so run it on a
+    dedicated database only.
+
+    """
+
+    with engine.connect() as connection:
+        queries = _hot_queries(connection)
+        connection.rollback()
+        results = {name: QueryBenchmark(name) for name in queries}
+
+        connection.execute(text("ANALYZE"))
+        connection.commit()
+        if compare:
+            transaction = connection.begin()
+            try:
+                for i in HOT_QUERY_INDEXES:
+                    connection.execute(text(f"DROP INDEX IF EXISTS {i}"))
+                for name, stmt in queries.items():
+                    results[name].without_indexes = _explain(connection, stmt)
+            finally:
+                transaction.rollback()
+
+        transaction = connection.begin()
+        try:
+            for name, stmt in queries.items():
+                results[name].with_indexes = _explain(connection, stmt)
+        finally:
+            transaction.rollback()
+    return list(results.values())
+
+
+def format_benchmarks(benchmarks: list[QueryBenchmark]) -> str:
+    def plan(i: QueryPlan | None) -> str:
+        if i is None:
+            return f"{'-':>30}"
+        return f"{i.execution_ms:>10.3f} ms {i.node:>16}"
+
+    lines = [f"{'query':<36}{'without indexes':>30}{'with indexes':>30}"]
+    for i in benchmarks:
+        lines.append(
+            f"{i.name:<36}{plan(i.without_indexes)}{plan(i.with_indexes)}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from cloyt.apps.daemon.entries import (
+    ISSUE_ID_PATTERN,
+    TIME_ENTRIES_DECODER,
+    parse_issue_id,
+    time_entry_fingerprint,
+)
+
+
+@dataclass
+class DecodingBenchmark:
+    name: str
+    microseconds_per_entry: float
+    bytes_per_entry: float
+
+
+def sample_time_entries_payload(entries: int) -> bytes:
+    """Clockify response with the given number of synthetic entries"""
+
+    rnd = random.Random(entries)
+    end = datetime(2024, 10, 16, 18, 0, tzinfo=timezone.utc)
+    rows = []
+    for i in range(entries):
+        start = end - timedelta(minutes=rnd.randrange(1, 240))
+        rows.append({
+            "id": f"{i:024x}",
+            "description": f"PRJ{i % 50}-{i} Implement feature {i}",
+            "tagIds": None,
+            "userId": "5e4117fe8c2e8e1f5d6a0b1c",
+            "billable": True,
+            "taskId": None,
+            "projectId": "5e4117fe8c2e8e1f5d6a0b1d",
+            "workspaceId": "5e4117fe8c2e8e1f5d6a0b1e",
+            "timeInterval": {
+                "start": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "end": end.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "duration": f"PT{(end - start).seconds // 60}M",
+            },
+            "customFieldValues": [],
+            "type": "REGULAR",
+            "kioskId": None,
+            "hourlyRate": {"amount": 0, "currency": "USD"},
+            "costRate": None,
+            "isLocked": False,
+        })
+        end = start - timedelta(minutes=rnd.randrange(0, 60))
+    return json.dumps(rows).encode()
+
+
+def _process_dicts(payload: bytes) -> list:
+    """Processing of the time entries before the typed model"""
+
+    entries = json.loads(payload)
+    sorted(
+        entries,
+        key=lambda x: datetime.fromisoformat(x["timeInterval"]["start"]),
+        reverse=True,
+    )
+    for entry in entries:
+        interval = entry["timeInterval"]
+        datetime.fromisoformat(interval["start"])
+        datetime.fromisoformat(interval["end"])
+        ISSUE_ID_PATTERN.match(entry["description"].strip())
+        hashlib.sha256("\x1f".join((
+            entry["description"], interval["start"], interval["end"] or "",
+        )).encode()).hexdigest()
+    return entries
+
+
+def _process_structs(payload: bytes) -> list:
+    entries = TIME_ENTRIES_DECODER.decode(payload)
+    sorted(entries, key=lambda x: x.start, reverse=True)
+    for entry in entries:
+        parse_issue_id(entry.description)
+        time_entry_fingerprint(entry)
+    return entries
+
+
+def _measure(
+        name: str,
+        process: Callable[[bytes], list],
+        payload: bytes,
+        entries: int,
+        rounds: int,
+) -> DecodingBenchmark:
+    started_at = time.perf_counter()
+    for _ in range(rounds):
+        process(payload)
+    elapsed = time.perf_counter() - started_at
+
+    tracemalloc.start()
+    try:
+        decoded = process(payload)
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del decoded
+    return DecodingBenchmark(
+        name=name,
+        microseconds_per_entry=elapsed / rounds / entries * 1_000_000,
+        bytes_per_entry=retained / entries,
+    )
+
+
+def benchmark_time_entry_decoding(
+        entries: int = 1_000,
+        rounds: int = 50,
+) -> list[DecodingBenchmark]:
+    """Measure per-entry CPU time and retained memory of entry decoding
+
+    Dicts are processed like the daemon did before the typed model, with
+    repeated timestamp parsing.  Retained memory is measured for the
+    decoded entries of one response.
+
+    """
+
+    payload = sample_time_entries_payload(entries)
+    return [
+        _measure("dicts", _process_dicts, payload, entries, rounds),
+        _measure("structs", _process_structs, payload, entries, rounds),
+    ]
+
+
+def format_decoding_benchmarks(benchmarks: list[DecodingBenchmark]) -> str:
+    lines = [f"{'model':<12}{'us/entry':>12}{'bytes/entry':>14}"]
+    for i in benchmarks:
+        lines.append(
+            f"{i.name:<12}{i.microseconds_per_entry:>12.2f}"
+            f"{i.bytes_per_entry:>14.0f}"
+        )
+    return "\n".join(lines)
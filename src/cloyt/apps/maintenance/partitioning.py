@@ -0,0 +1,185 @@
+from datetime import date
+from logging import getLogger
+
+from sqlalchemy import Connection, text
+
+from cloyt.infrastructure import DaemonConfig
+
+
+logger = getLogger(__name__)
+
+
+DEFAULT_PARTITION = "work_item_default"
+ARCHIVE_PREFIX = "work_item_archive_"
+
+
+def _month_start(day: date, shift: int = 0) -> date:
+    month = day.year * 12 + day.month - 1 + shift
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def _partition_name(month: date) -> str:
+    return f"work_item_y{month.year:04d}m{month.month:02d}"
+
+
+def _partition_month(name: str) -> date | None:
+    if not name.startswith("work_item_y"):
+        return None
+    return date(int(name[11:15]), int(name[16:18]), 1)
+
+
+def is_work_item_partitioned(connection: Connection) -> bool:
+    return connection.scalar(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table"
+        " WHERE partrelid = 'work_item'::regclass)"
+    ))
+
+
+def _work_item_partitions(connection: Connection) -> list[str]:
+    return list(connection.scalars(text(
+        "SELECT c.relname FROM pg_inherits i"
+        " JOIN pg_class c ON c.oid = i.inhrelid"
+        " WHERE i.inhparent = 'work_item'::regclass"
+    )))
+
+
+def _create_partition(connection: Connection, table: str, month: date):
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {_partition_name(month)}"
+        f" PARTITION OF {table}"
+        f" FOR VALUES FROM ('{month.isoformat()}')"
+        f" TO ('{_month_start(month, 1).isoformat()}')"
+    ))
+
+
+def partition_work_item(connection: Connection, months_ahead: int = 3):
+    """Convert `work_item` to the table partitioned by month of creation
+
+    Rows are copied to the new table under exclusive lock, so run it in
+    a maintenance window.  Partitioned table can't have unique
+    constraints without the partition key, so the unique constraint of
+    `clockify_time_entry_id` is replaced with plain index.  Uniqueness of
+    `youtrack_id` per tenant is kept by the trigger.  Set
+    `daemon.work_item_dedupe_horizon_days` after the conversion, so the
+    daemon looks work items up in recent partitions only.
+
+    The conversion is one-way, there is no automatic downgrade.
+
+    """
+
+    if is_work_item_partitioned(connection):
+        logger.info("Table work_item is already partitioned")
+        return
+
+    connection.execute(text("LOCK TABLE work_item IN ACCESS EXCLUSIVE MODE"))
+    first_month = connection.scalar(text(
+        "SELECT date_trunc('month', min(created_at))::date FROM work_item"
+    ))
+    current_month = _month_start(date.today())
+    month = first_month or current_month
+
+    connection.execute(text(
+        "CREATE TABLE work_item_partitioned"
+        " (LIKE work_item INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        " PARTITION BY RANGE (created_at)"
+    ))
+    connection.execute(text(
+        "ALTER TABLE work_item_partitioned"
+        " ADD CONSTRAINT work_item_partitioned_pkey"
+        " PRIMARY KEY (id, created_at)"
+    ))
+    while month <= _month_start(current_month, months_ahead):
+        _create_partition(connection, "work_item_partitioned", month)
+        month = _month_start(month, 1)
+    connection.execute(text(
+        f"CREATE TABLE {DEFAULT_PARTITION}"
+        f" PARTITION OF work_item_partitioned DEFAULT"
+    ))
+
+    connection.execute(text(
+        "INSERT INTO work_item_partitioned SELECT * FROM work_item"
+    ))
+    connection.execute(text("ALTER SEQUENCE work_item_id_seq OWNED BY NONE"))
+    connection.execute(text("DROP TABLE work_item"))
+    connection.execute(text(
+        "ALTER TABLE work_item_partitioned RENAME TO work_item"
+    ))
+    connection.execute(text(
+        "ALTER TABLE work_item RENAME CONSTRAINT work_item_partitioned_pkey"
+        " TO work_item_pkey"
+    ))
+    connection.execute(text(
+        "ALTER SEQUENCE work_item_id_seq OWNED BY work_item.id"
+    ))
+    for stmt in (
+        "CREATE INDEX ix_work_item_project_member_id"
+        " ON work_item (project_member_id)",
+        "CREATE INDEX ix_work_item_created_at_id"
+        " ON work_item (created_at, id)",
+        "CREATE INDEX ix_work_item_clockify_time_entry_id"
+        " ON work_item (clockify_time_entry_id, created_at)",
+        "CREATE INDEX ix_work_item_youtrack_id"
+        " ON work_item (youtrack_id)",
+        "ALTER TABLE work_item ADD CONSTRAINT work_item_project_member_id_fkey"
+        " FOREIGN KEY (project_member_id) REFERENCES project_member (id)",
+        "ALTER TABLE work_item ADD CONSTRAINT work_item_work_item_type_id_fkey"
+        " FOREIGN KEY (work_item_type_id) REFERENCES work_item_type (id)",
+        # the function is created by the migration of tenant uniqueness
+        "CREATE TRIGGER work_item_youtrack_id_unique"
+        " BEFORE INSERT OR UPDATE OF youtrack_id, project_member_id"
+        " ON work_item FOR EACH ROW"
+        " EXECUTE FUNCTION work_item_check_youtrack_id()",
+    ):
+        connection.execute(text(stmt))
+    logger.info("Table work_item is partitioned by month")
+
+
+def maintain_work_item_partitions(
+        connection: Connection,
+        config: DaemonConfig,
+        months_ahead: int = 3,
+):
+    """Create partitions of next months and apply the retention policy
+
+    Partitions older than `work_item_retention_months` are detached and
+    renamed with the archive prefix, or dropped when the retention mode
+    is `drop`.  Daily totals are kept, so the dashboard still shows the
+    history.  Does nothing for not partitioned `work_item`.
+
+    """
+
+    if not is_work_item_partitioned(connection):
+        return
+
+    current_month = _month_start(date.today())
+    for shift in range(months_ahead + 1):
+        _create_partition(
+            connection, "work_item", _month_start(current_month, shift),
+        )
+
+    if config.work_item_retention_months is None:
+        return
+    horizon_days = config.work_item_dedupe_horizon_days
+    if (horizon_days is None
+            or horizon_days > config.work_item_retention_months * 28):
+        raise RuntimeError(
+            "Work item retention must be longer than the dedupe horizon,"
+            " otherwise the daemon may push archived work items again"
+        )
+
+    cutoff = _month_start(current_month, -config.work_item_retention_months)
+    for name in _work_item_partitions(connection):
+        month = _partition_month(name)
+        if month is None or month >= cutoff:
+            continue
+        connection.execute(text(
+            f"ALTER TABLE work_item DETACH PARTITION {name}"
+        ))
+        if config.work_item_retention_mode == "drop":
+            connection.execute(text(f"DROP TABLE {name}"))
+            logger.info("Partition %s dropped by retention policy", name)
+        else:
+            connection.execute(text(
+                f"ALTER TABLE {name} RENAME TO {ARCHIVE_PREFIX}{name[10:]}"
+            ))
+            logger.info("Partition %s archived by retention policy", name)
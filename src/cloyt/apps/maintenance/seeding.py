@@ -0,0 +1,281 @@
+import random
+import secrets
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from logging import getLogger
+from typing import Iterator
+
+from sqlalchemy import Connection, Engine, insert
+
+from cloyt.apps.daemon.daily_totals import rebuild_daily_totals
+from cloyt.domain.models import (
+    Employee,
+    Project,
+    ProjectMember,
+    SkipReason,
+    SyncOutcomeKind,
+    Tenant,
+    WorkItemType,
+)
+
+
+logger = getLogger(__name__)
+
+
+COPY_WORK_ITEMS = (
+    "COPY work_item (project_member_id, clockify_time_entry_id,"
+    " youtrack_id, issue_id, fingerprint, started_at, duration,"
+    " work_item_type_id, text, created_at) FROM STDIN"
+)
+
+COPY_SKIPPED_TIME_ENTRIES = (
+    "COPY skipped_time_entry (employee_id, clockify_time_entry_id,"
+    " content_hash, reason, details, attempts, retry_after, created_at)"
+    " FROM STDIN"
+)
+
+COPY_SYNC_OUTCOMES = (
+    "COPY sync_outcome (employee_id, clockify_time_entry_id, outcome,"
+    " issue_id, details, created_at) FROM STDIN"
+)
+
+
+@dataclass
+class SeedSize:
+    tenants: int = 0
+    employees: int = 100
+    projects: int = 1_000
+    work_item_types_per_project: int = 2
+    memberships_per_employee: int = 20
+    work_items: int = 1_000_000
+    skipped_entries: int = 10_000
+    sync_outcomes: int = 100_000
+    batch_size: int = 10_000
+    copy_batch_size: int = 200_000
+
+
+def _batches(rows: Iterator, size: int) -> Iterator[list]:
+    batch = []
+    for i in rows:
+        batch.append(i)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert_returning_ids(
+        connection: Connection,
+        model: type,
+        rows: list[dict],
+        batch_size: int,
+) -> list[int]:
+    ids = []
+    for i in _batches(iter(rows), batch_size):
+        ids.extend(connection.scalars(
+            insert(model).returning(
+                model.id, sort_by_parameter_order=True,
+            ),
+            i,
+        ))
+    return ids
+
+
+def _copy(
+        engine: Engine,
+        statement: str,
+        rows: Iterator[tuple],
+        total: int,
+        batch_size: int,
+        name: str,
+):
+    """COPY rows in transactions of the batch size, logging the progress"""
+
+    copied = 0
+    for batch in _batches(rows, batch_size):
+        with engine.begin() as connection:
+            driver_connection = connection.connection.driver_connection
+            with driver_connection.cursor() as cursor:
+                with cursor.copy(statement) as copy:
+                    for i in batch:
+                        copy.write_row(i)
+        copied += len(batch)
+        logger.info("Seeded %s/%s %s", copied, total, name)
+
+
+def seed(engine: Engine, size: SeedSize) -> str:
+    """Fill the database with synthetic data, return run tag
+
+    Every seeded token, name and identifier contains the run tag, so
+    seeding can be repeated on the same database.  Catalog rows are
+    inserted in batches, because their ids are needed for references.
+    Work items, skipped time entries and sync outcomes are written with
+    COPY, so tens of millions of rows take minutes.
+
+    """
+
+    tag = f"seed-{secrets.token_hex(4)}"
+    rnd = random.Random(tag)
+    now = datetime.now()
+
+    with engine.begin() as connection:
+        tenant_ids: list[int | None] = [None]
+        tenant_ids += _insert_returning_ids(
+            connection,
+            Tenant,
+            [
+                {
+                    "name": f"{tag} tenant {i}",
+                    "youtrack_base_url": f"https://{tag}-{i}.youtrack.cloud",
+                    "created_at": now,
+                }
+                for i in range(size.tenants)
+            ],
+            size.batch_size,
+        )
+        employee_tenants = [tenant_ids[i % len(tenant_ids)]
+                            for i in range(size.employees)]
+        employee_ids = _insert_returning_ids(
+            connection,
+            Employee,
+            [
+                {
+                    "tenant_id": employee_tenants[i],
+                    "full_name": f"{tag} employee {i}",
+                    "clockify_token": f"{tag}-clockify-{i}",
+                    "clockify_user_id": f"{tag}-user-{i}",
+                    "clockify_workspace_id": f"{tag}-workspace",
+                    "youtrack_token": f"{tag}-youtrack-{i}",
+                    "created_at": now,
+                }
+                for i in range(size.employees)
+            ],
+            size.batch_size,
+        )
+        project_tenants = [tenant_ids[i % len(tenant_ids)]
+                           for i in range(size.projects)]
+        project_ids = _insert_returning_ids(
+            connection,
+            Project,
+            [
+                {
+                    "tenant_id": project_tenants[i],
+                    "youtrack_id": f"{tag}-project-{i}",
+                    "name": f"{tag} project {i}",
+                    "short_name": f"S{tag[5:].upper()}{i}",
+                    "created_at": now,
+                }
+                for i in range(size.projects)
+            ],
+            size.batch_size,
+        )
+        type_rows = [
+            {
+                "tenant_id": project_tenants[i],
+                "project_id": project_id,
+                "name": f"{tag} type {i}.{j}",
+                "youtrack_id": f"{tag}-type-{i}-{j}",
+                "created_at": now,
+            }
+            for i, project_id in enumerate(project_ids)
+            for j in range(size.work_item_types_per_project)
+        ]
+        type_ids = _insert_returning_ids(
+            connection, WorkItemType, type_rows, size.batch_size,
+        )
+        project_type_ids = defaultdict(list)
+        for i, row in zip(type_ids, type_rows):
+            project_type_ids[row["project_id"]].append(i)
+
+        # employees are members of projects of their own tenant only
+        tenant_project_ids = defaultdict(list)
+        for tenant_id, project_id in zip(project_tenants, project_ids):
+            tenant_project_ids[tenant_id].append(project_id)
+        memberships = []
+        for employee_id, tenant_id in zip(employee_ids, employee_tenants):
+            candidates = tenant_project_ids[tenant_id]
+            for i in rnd.sample(
+                    candidates,
+                    min(size.memberships_per_employee, len(candidates)),
+            ):
+                memberships.append({
+                    "employee_id": employee_id,
+                    "project_id": i,
+                    "sync_enabled": True,
+                    "created_at": now,
+                })
+        member_ids = _insert_returning_ids(
+            connection, ProjectMember, memberships, size.batch_size,
+        )
+    logger.info("Seeded %s tenants, %s employees, %s projects, %s work"
+                " item types and %s memberships", size.tenants,
+                len(employee_ids), len(project_ids), len(type_ids),
+                len(member_ids))
+
+    members = [
+        (member_id, project_type_ids[row["project_id"]])
+        for member_id, row in zip(member_ids, memberships)
+    ]
+
+    def work_items() -> Iterator[tuple]:
+        for i in range(size.work_items):
+            member_id, member_type_ids = rnd.choice(members)
+            started_at = now - timedelta(minutes=rnd.randrange(60 * 24 * 730))
+            duration = timedelta(minutes=rnd.randrange(1, 480))
+            yield (
+                member_id,
+                f"{tag}-entry-{i}",
+                f"{tag}-work-item-{i}",
+                f"S{i % 1000}-{i}",
+                f"{rnd.getrandbits(256):064x}",
+                started_at,
+                duration,
+                rnd.choice(member_type_ids) if member_type_ids else None,
+                f"**{tag} work item {i}**",
+                started_at + duration,
+            )
+
+    def skipped_entries() -> Iterator[tuple]:
+        reasons = list(SkipReason)
+        for i in range(size.skipped_entries):
+            reason = rnd.choice(reasons)
+            retry_after = None
+            if reason != SkipReason.UNMATCHED_DESCRIPTION:
+                retry_after = now + timedelta(seconds=rnd.randrange(86400))
+            yield (
+                rnd.choice(employee_ids),
+                f"{tag}-skipped-entry-{i}",
+                f"{rnd.getrandbits(256):064x}",
+                reason.value,
+                f"{tag} skipped entry {i}",
+                rnd.randrange(1, 10),
+                retry_after,
+                now - timedelta(minutes=rnd.randrange(60 * 24 * 30)),
+            )
+
+    def sync_outcomes() -> Iterator[tuple]:
+        outcomes = list(SyncOutcomeKind)
+        for i in range(size.sync_outcomes):
+            yield (
+                rnd.choice(employee_ids),
+                f"{tag}-entry-{rnd.randrange(max(size.work_items, 1))}",
+                rnd.choice(outcomes).value,
+                f"S{i % 1000}-{i}",
+                None,
+                now - timedelta(minutes=rnd.randrange(60 * 24 * 30)),
+            )
+
+    if members:
+        _copy(engine, COPY_WORK_ITEMS, work_items(), size.work_items,
+              size.copy_batch_size, "work items")
+    if employee_ids:
+        _copy(engine, COPY_SKIPPED_TIME_ENTRIES, skipped_entries(),
+              size.skipped_entries, size.copy_batch_size, "skipped entries")
+        _copy(engine, COPY_SYNC_OUTCOMES, sync_outcomes(),
+              size.sync_outcomes, size.copy_batch_size, "sync outcomes")
+
+    with engine.begin() as connection:
+        rebuild_daily_totals(connection)
+    return tag
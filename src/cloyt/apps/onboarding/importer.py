@@ -0,0 +1,206 @@
+import csv
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from logging import getLogger
+from typing import Iterable
+
+from sqlalchemy.dialects.postgresql import Insert, insert
+from youtrack_sdk.exceptions import YouTrackUnauthorized
+
+from cloyt.apps.daemon.entries import CLOCKIFY_API_URL, get_clockify_user
+from cloyt.apps.daemon.youtrack import CloytYouTrackClient
+from cloyt.domain.models import Employee, Tenant
+
+
+logger = getLogger(__name__)
+
+
+CSV_COLUMNS = [
+    "full_name",
+    "clockify_token",
+    "youtrack_token",
+    "tenant",
+    "comment",
+]
+
+REQUIRED_CSV_COLUMNS = ["full_name", "clockify_token", "youtrack_token"]
+
+
+@dataclass
+class EmployeeRow:
+    line: int
+    full_name: str
+    clockify_token: str
+    youtrack_token: str
+    tenant: str | None = None
+    comment: str | None = None
+    tenant_id: int | None = None
+    clockify_user_id: str | None = None
+    clockify_workspace_id: str | None = None
+    errors: list[str] = field(default_factory=list)
+
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+    def values(self) -> dict:
+        return {
+            "full_name": self.full_name,
+            "clockify_token": self.clockify_token,
+            "clockify_user_id": self.clockify_user_id,
+            "clockify_workspace_id": self.clockify_workspace_id,
+            "youtrack_token": self.youtrack_token,
+            "tenant_id": self.tenant_id,
+            "comment": self.comment,
+            "created_at": datetime.now(),
+        }
+
+
+def read_employees_csv(lines: Iterable[str]) -> list[EmployeeRow]:
+    """Read employees from CSV with the header of `CSV_COLUMNS`
+
+    The `tenant` (name) and `comment` columns are optional, employees
+    without tenant belong to the default one.  Rows with missing values are
+    returned with errors, so they are reported along with the rows
+    rejected by validation.
+
+    """
+
+    reader = csv.DictReader(lines)
+    missing = [i for i in REQUIRED_CSV_COLUMNS
+               if i not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"CSV header misses columns: {', '.join(missing)}")
+
+    rows = []
+    for raw in reader:
+        row = EmployeeRow(
+            line=reader.line_num,
+            full_name=(raw["full_name"] or "").strip(),
+            clockify_token=(raw["clockify_token"] or "").strip(),
+            youtrack_token=(raw["youtrack_token"] or "").strip(),
+            tenant=(raw.get("tenant") or "").strip() or None,
+            comment=(raw.get("comment") or "").strip() or None,
+        )
+        for i in REQUIRED_CSV_COLUMNS:
+            if not getattr(row, i):
+                row.errors.append(f"{i} is empty")
+        rows.append(row)
+    return rows
+
+
+def _validate_clockify(row: EmployeeRow, clockify_api_url: str):
+    try:
+        user = get_clockify_user(row.clockify_token, clockify_api_url)
+    except Exception as e:
+        row.errors.append(f"clockify token is rejected: {e}")
+        return
+    row.clockify_user_id = user["id"]
+    row.clockify_workspace_id = (user.get("activeWorkspace")
+                                 or user.get("defaultWorkspace"))
+    if row.clockify_workspace_id is None:
+        row.errors.append("clockify user has no workspace")
+
+
+def _validate_youtrack(row: EmployeeRow, youtrack_base_url: str):
+    client = CloytYouTrackClient(
+        base_url=youtrack_base_url,
+        token=row.youtrack_token,
+        timeout=5,
+    )
+    try:
+        client.get_me()
+    except YouTrackUnauthorized:
+        row.errors.append("youtrack token is rejected")
+    except Exception as e:
+        row.errors.append(f"youtrack token is not checked: {e}")
+
+
+def validate_employees(
+        rows: list[EmployeeRow],
+        youtrack_base_url: str,
+        tenants: dict[str, Tenant] | None = None,
+        max_workers: int = 16,
+) -> list[EmployeeRow]:
+    """Check tokens of the rows against both APIs concurrently
+
+    Tokens are checked against the instances of the row tenant, given by
+    name.  Resolves clockify user and workspace of valid rows.  Rows that
+    repeat a token or clockify user of a previous row are rejected.
+
+    """
+
+    tenants = tenants or {}
+    with ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="onboarding",
+    ) as executor:
+        futures = []
+        for i in rows:
+            if not i.valid:
+                continue
+            clockify_api_url = CLOCKIFY_API_URL
+            row_youtrack_base_url = youtrack_base_url
+            if i.tenant is not None:
+                tenant = tenants.get(i.tenant)
+                if tenant is None:
+                    i.errors.append(f"tenant {i.tenant} does not exist")
+                    continue
+                i.tenant_id = tenant.id
+                clockify_api_url = tenant.clockify_api_url or clockify_api_url
+                row_youtrack_base_url = tenant.youtrack_base_url
+            futures.append(executor.submit(
+                _validate_clockify, i, clockify_api_url,
+            ))
+            futures.append(executor.submit(
+                _validate_youtrack, i, row_youtrack_base_url,
+            ))
+        for i in futures:
+            i.result()
+
+    seen = set()
+    for i in rows:
+        if not i.valid:
+            continue
+        keys = {
+            ("clockify token", i.clockify_token),
+            ("youtrack token", i.youtrack_token),
+            ("clockify user", i.clockify_user_id),
+        }
+        for name, _ in keys & seen:
+            i.errors.append(f"{name} repeats a previous row")
+        seen |= keys
+    logger.info("Validated %s employees to onboard, %s are valid",
+                len(rows), sum(i.valid for i in rows))
+    return rows
+
+
+def employees_insert(rows: list[EmployeeRow]) -> Insert:
+    """Insert all valid rows at once, skipping already existing employees
+
+    Returns clockify user ids of the inserted employees.
+
+    """
+
+    return (
+        insert(Employee)
+        .values([i.values() for i in rows if i.valid])
+        .on_conflict_do_nothing()
+        .returning(Employee.clockify_user_id)
+    )
+
+
+def mark_existing(rows: list[EmployeeRow], inserted_user_ids: set[str]):
+    for i in rows:
+        if i.valid and i.clockify_user_id not in inserted_user_ids:
+            i.errors.append("employee already exists")
+
+
+def format_onboarding(rows: list[EmployeeRow]) -> str:
+    lines = []
+    for i in rows:
+        status = "ok" if i.valid else "; ".join(i.errors)
+        lines.append(f"line {i.line}: {i.full_name or '-'}: {status}")
+    lines.append(f"Valid rows: {sum(i.valid for i in rows)} of {len(rows)}")
+    return "\n".join(lines)
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from enum import StrEnum
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -10,10 +11,36 @@ class Base(DeclarativeBase):
     created_at: Mapped[datetime] = mapped_column(default=datetime.now)
 
 
+class Tenant(Base):
+    """YouTrack instance with its own limits in the shared daemon
+
+    Employees and projects without tenant belong to the default tenant,
+    configured by the daemon configuration.
+
+    """
+
+    __tablename__ = "tenant"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(unique=True)
+    youtrack_base_url: Mapped[str]
+    clockify_api_url: Mapped[str | None]
+    push_concurrency: Mapped[int | None]
+    requests_per_second: Mapped[float | None]
+    comment: Mapped[str | None]
+
+    def __str__(self):
+        return self.name
+
+
 class Employee(Base):
     __tablename__ = "employee"
 
     id: Mapped[int] = mapped_column(primary_key=True)
+    tenant_id: Mapped[int | None] = mapped_column(
+        ForeignKey("tenant.id"),
+        index=True,
+    )
     full_name: Mapped[str]
     clockify_token: Mapped[str] = mapped_column(unique=True)
     clockify_user_id: Mapped[str] = mapped_column(unique=True)
@@ -22,6 +49,7 @@ class Employee(Base):
     deleted_at: Mapped[datetime | None]
     comment: Mapped[str | None]
 
+    tenant: Mapped[Tenant | None] = relationship()
     projects: Mapped[list[Project]] = relationship(
         secondary=lambda: ProjectMember.__table__,
         viewonly=False,
@@ -33,15 +61,25 @@ class Employee(Base):
 
 class Project(Base):
     __tablename__ = "project"
+    __table_args__ = (
+        UniqueConstraint(
+            "tenant_id",
+            "youtrack_id",
+            name="uq_project_tenant_id_youtrack_id",
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    youtrack_id: Mapped[str] = mapped_column(unique=True)
+    tenant_id: Mapped[int | None] = mapped_column(ForeignKey("tenant.id"))
+    youtrack_id: Mapped[str]
     name: Mapped[str]
-    short_name: Mapped[str]
+    short_name: Mapped[str] = mapped_column(index=True)
     default_work_item_type_id: Mapped[int | None] = mapped_column(
         ForeignKey("work_item_type.id"),
     )
 
+    tenant: Mapped[Tenant | None] = relationship()
     employees: Mapped[list[Employee]] = relationship(
         secondary=lambda: ProjectMember.__table__,
         viewonly=True,
@@ -56,11 +94,26 @@ class Project(Base):
 
 class WorkItemType(Base):
     __tablename__ = "work_item_type"
+    __table_args__ = (
+        UniqueConstraint(
+            "tenant_id",
+            "name",
+            name="uq_work_item_type_tenant_id_name",
+            postgresql_nulls_not_distinct=True,
+        ),
+        UniqueConstraint(
+            "tenant_id",
+            "youtrack_id",
+            name="uq_work_item_type_tenant_id_youtrack_id",
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
+    tenant_id: Mapped[int | None] = mapped_column(ForeignKey("tenant.id"))
     project_id: Mapped[int] = mapped_column(ForeignKey("project.id"))
-    name: Mapped[str] = mapped_column(unique=True)
-    youtrack_id: Mapped[str] = mapped_column(unique=True)
+    name: Mapped[str]
+    youtrack_id: Mapped[str]
 
     def __str__(self):
         return f"{self.name} (youtrack_id={self.youtrack_id})"
@@ -68,6 +121,14 @@ class WorkItemType(Base):
 
 class ProjectMember(Base):
     __tablename__ = "project_member"
+    __table_args__ = (
+        Index(
+            "ix_project_member_employee_id_project_id",
+            "employee_id",
+            "project_id",
+            unique=True,
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     employee_id: Mapped[int] = mapped_column(ForeignKey("employee.id"))
@@ -85,13 +146,22 @@ class ProjectMember(Base):
 
 class WorkItem(Base):
     __tablename__ = "work_item"
+    __table_args__ = (
+        Index("ix_work_item_created_at_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     project_member_id: Mapped[int] = mapped_column(
         ForeignKey("project_member.id"),
+        index=True,
     )
     clockify_time_entry_id: Mapped[str] = mapped_column(unique=True)
-    youtrack_id: Mapped[str] = mapped_column(unique=True)
+    # youtrack ids are unique per instance only, uniqueness per tenant is
+    # guarded by the work_item_youtrack_id_unique trigger
+    youtrack_id: Mapped[str] = mapped_column(index=True)
+    issue_id: Mapped[str | None]
+    fingerprint: Mapped[str | None]
+    started_at: Mapped[datetime | None]
     duration: Mapped[timedelta]
     work_item_type_id: Mapped[str | None] = mapped_column(
         ForeignKey("work_item_type.id"),
@@ -99,3 +169,105 @@ class WorkItem(Base):
     text: Mapped[str]
 
     work_item_type: Mapped[WorkItemType] = relationship()
+
+
+class SkipReason(StrEnum):
+    UNMATCHED_DESCRIPTION = "unmatched_description"
+    UNKNOWN_PROJECT = "unknown_project"
+    YOUTRACK_ERROR = "youtrack_error"
+
+
+class SkippedTimeEntry(Base):
+    """Clockify time entry quarantined by the daemon
+
+    The entry is not processed again while its content hash matches and
+    `retry_after` is not reached.  Null `retry_after` means that the entry
+    is skipped until it is edited.
+
+    """
+
+    __tablename__ = "skipped_time_entry"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    employee_id: Mapped[int] = mapped_column(ForeignKey("employee.id"))
+    clockify_time_entry_id: Mapped[str] = mapped_column(unique=True)
+    content_hash: Mapped[str]
+    reason: Mapped[str]
+    details: Mapped[str | None]
+    attempts: Mapped[int] = mapped_column(default=1)
+    retry_after: Mapped[datetime | None]
+
+    employee: Mapped[Employee] = relationship(viewonly=True)
+
+
+class SyncOutcomeKind(StrEnum):
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    TOLERANCE_DELAY = "tolerance_delay"
+    BEFORE_THRESHOLD = "before_threshold"
+    UNMATCHED_DESCRIPTION = "unmatched_description"
+    UNKNOWN_PROJECT = "unknown_project"
+    MISSING_MEMBERSHIP = "missing_membership"
+    YOUTRACK_ERROR = "youtrack_error"
+    TIMEOUT = "timeout"
+    UNEXPECTED_ERROR = "unexpected_error"
+
+
+class SyncOutcome(Base):
+    """What the daemon did with the time entry on an employee sync
+
+    Entries that are already synced and not changed, or stay
+    quarantined, are not journaled, so the journal grows with the
+    changes only.
+
+    """
+
+    __tablename__ = "sync_outcome"
+    __table_args__ = (
+        Index("ix_sync_outcome_created_at_id", "created_at", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    employee_id: Mapped[int] = mapped_column(ForeignKey("employee.id"))
+    clockify_time_entry_id: Mapped[str] = mapped_column(index=True)
+    outcome: Mapped[str]
+    issue_id: Mapped[str | None]
+    details: Mapped[str | None]
+
+    employee: Mapped[Employee] = relationship(viewonly=True)
+
+
+class WorkItemDailyTotal(Base):
+    """Synced duration per day, employee, project and work item type
+
+    The daemon maintains totals incrementally, in the transactions that
+    change `work_item`.
+
+    """
+
+    __tablename__ = "work_item_daily_total"
+    __table_args__ = (
+        UniqueConstraint(
+            "day",
+            "employee_id",
+            "project_id",
+            "work_item_type_id",
+            name="uq_work_item_daily_total",
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    day: Mapped[date]
+    employee_id: Mapped[int] = mapped_column(ForeignKey("employee.id"))
+    project_id: Mapped[int] = mapped_column(ForeignKey("project.id"))
+    work_item_type_id: Mapped[int | None] = mapped_column(
+        ForeignKey("work_item_type.id"),
+    )
+    duration: Mapped[timedelta]
+    work_items: Mapped[int]
+
+    employee: Mapped[Employee] = relationship(viewonly=True)
+    project: Mapped[Project] = relationship(viewonly=True)
+    work_item_type: Mapped[WorkItemType | None] = relationship(viewonly=True)
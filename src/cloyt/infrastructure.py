@@ -1,6 +1,6 @@
 from datetime import datetime
 from os import getenv
-from typing import AsyncIterable, Iterable, Type
+from typing import AsyncIterable, Iterable, Literal, Type
 
 import zoneinfo
 from dishka import Provider, provide, Scope
@@ -23,6 +23,10 @@ from sqlalchemy.ext.asyncio import (
 )
 
 
+# postgres channel, that the admin notifies with id of changed employee
+SYNC_NOTIFY_CHANNEL = "cloyt_sync"
+
+
 class PostgresConfig(BaseModel):
     host: str
     port: int
@@ -40,12 +44,22 @@ class PostgresConfig(BaseModel):
             self.database,
         )
 
+    def get_conninfo(self) -> dict:
+        return {
+            "host": self.host,
+            "port": self.port,
+            "user": self.user,
+            "password": self.password,
+            "dbname": self.database,
+        }
+
 
 class AdminConfig(BaseModel):
     secret_key: str
     username: str
     password: str
     logging_level: str = "DEBUG"
+    logging_json: bool = False
     logs_path: str
 
 
@@ -55,8 +69,27 @@ class DaemonConfig(BaseModel):
     sync_window_size: int
     ignore_entries_before: datetime
     youtrack_base_url: str
+    push_concurrency: int = 4
+    push_concurrency_global: int = 8
+    youtrack_requests_per_second: float | None = None
+    iteration_budget_seconds: int | None = None
+    employee_slice_min_seconds: int = 5
+    catalog_refresh_seconds: int = 3600
+    warm_cache_path: str | None = None
+    warm_cache_max_age_seconds: int = 3600
+    skip_retry_base_seconds: int = 600
+    skip_retry_max_seconds: int = 86400
+    work_item_dedupe_horizon_days: int | None = None
+    work_item_retention_months: int | None = None
+    work_item_retention_mode: Literal["detach", "drop"] = "detach"
+    sync_outcome_retention_days: int = 30
+    health_port: int | None = None
+    health_max_iteration_age_seconds: int = 900
+    health_max_sync_lag_seconds: int = 3600
     tz: zoneinfo.ZoneInfo
     logging_level: str = "DEBUG"
+    logging_json: bool = False
+    logging_debug_sample_rate: float = 1.0
     logs_path: str
 
 
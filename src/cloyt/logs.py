@@ -0,0 +1,96 @@
+import atexit
+import json
+import logging
+from logging import Handler, LogRecord
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from threading import Lock
+
+
+LOG_FORMAT = "[%(asctime)s] [%(levelname)s] - %(name)s - %(message)s"
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Pass only a share of debug records of every message template
+
+    Records are counted per unformatted message, so the share is kept for
+    every kind of event, and rare events are not lost.
+
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.every = max(round(1 / rate), 1) if rate > 0 else 0
+        self.counters: dict[str, int] = {}
+        self.lock = Lock()
+
+    def filter(self, record: LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        if not self.every:
+            return False
+        key = str(record.msg)
+        with self.lock:
+            count = self.counters.get(key, 0)
+            self.counters[key] = count + 1
+        return count % self.every == 0
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Queue handler that leaves formatting to the listener thread
+
+    Default `QueueHandler.prepare` formats the message in the logging
+    thread to make records picklable, which is not needed for in-process
+    queue.
+
+    """
+
+    def prepare(self, record: LogRecord) -> LogRecord:
+        return record
+
+
+def setup_logging(
+        handlers: list[Handler],
+        level: str,
+        json_output: bool = False,
+        debug_sample_rate: float = 1.0,
+) -> QueueListener:
+    """Configure root logger to write through background thread
+
+    Records are put to the queue by the logging thread, and formatted and
+    written by the returned listener, so logging I/O does not block the
+    caller.
+
+    """
+
+    if json_output:
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(LOG_FORMAT)
+    for i in handlers:
+        i.setFormatter(formatter)
+
+    queue = SimpleQueue()
+    queue_handler = DeferredQueueHandler(queue)
+    if debug_sample_rate < 1:
+        queue_handler.addFilter(DebugSamplingFilter(debug_sample_rate))
+
+    listener = QueueListener(queue, *handlers, respect_handler_level=True)
+    logging.basicConfig(level=level, handlers=[queue_handler])
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
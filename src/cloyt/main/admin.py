@@ -1,5 +1,4 @@
 from os import path
-from logging import basicConfig
 from logging.handlers import TimedRotatingFileHandler
 from contextlib import asynccontextmanager
 
@@ -10,6 +9,7 @@ from dishka.integrations.fastapi import setup_dishka
 
 from cloyt.infrastructure import InfrastructureProvider, AdminConfig
 from cloyt.apps.admin.views import setup_admin
+from cloyt.logs import setup_logging
 
 
 def main():
@@ -19,7 +19,7 @@ def main():
     @asynccontextmanager
     async def fastapi_admin_setup(app_):
         config: AdminConfig = await container.get(AdminConfig)
-        basicConfig(
+        setup_logging(
             level=config.logging_level,
             handlers=[
                 TimedRotatingFileHandler(
@@ -28,7 +28,7 @@ def main():
                     when="midnight",
                 ),
             ],
-            format="[%(asctime)s] [%(levelname)s] - %(name)s - %(message)s",
+            json_output=config.logging_json,
         )
         await setup_admin(container, app_)
         yield
@@ -1,15 +1,43 @@
 import logging
-from logging import basicConfig
+from argparse import ArgumentParser
+from datetime import datetime
 from logging.handlers import TimedRotatingFileHandler
 from os import path
 
 from dishka import make_container
 
 from cloyt.infrastructure import InfrastructureProvider, DaemonConfig
+from cloyt.logs import setup_logging
 from cloyt.apps.daemon.synchronizer import CloytSynchronizer
+from cloyt.apps.daemon.reconciler import CloytReconciler, default_since
 
 
 def main():
+    parser = ArgumentParser(prog="cloyt-daemon")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("run", help="run synchronization loop (default)")
+    reconcile_parser = subparsers.add_parser(
+        "reconcile",
+        help="compare work items of youtrack, clockify and the database",
+    )
+    reconcile_parser.add_argument(
+        "--since", type=datetime.fromisoformat,
+        help="start of the date range (default: 30 days ago)",
+    )
+    reconcile_parser.add_argument(
+        "--until", type=datetime.fromisoformat,
+        help="end of the date range (default: now)",
+    )
+    reconcile_parser.add_argument(
+        "--employee-id", type=int,
+        help="reconcile only the employee",
+    )
+    reconcile_parser.add_argument(
+        "--repair", action="store_true",
+        help="repair found orphans and duplicates",
+    )
+    args = parser.parse_args()
+
     container = make_container(InfrastructureProvider())
     config: DaemonConfig = container.get(DaemonConfig)
     warn_level_handler = TimedRotatingFileHandler(
@@ -18,7 +46,7 @@ def main():
         when="midnight",
     )
     warn_level_handler.setLevel(logging.WARNING)
-    basicConfig(
+    setup_logging(
         level=config.logging_level,
         handlers=[
             TimedRotatingFileHandler(
@@ -28,7 +56,21 @@ def main():
             ),
             warn_level_handler,
         ],
-        format="[%(asctime)s] [%(levelname)s] - %(name)s - %(message)s",
+        json_output=config.logging_json,
+        debug_sample_rate=config.logging_debug_sample_rate,
     )
+
+    if args.command == "reconcile":
+        reconciler = CloytReconciler(container)
+        report = reconciler.reconcile(
+            since=(args.since or default_since(config))
+            .astimezone(config.tz),
+            until=(args.until or datetime.now()).astimezone(config.tz),
+            employee_id=args.employee_id,
+            repair=args.repair,
+        )
+        print(report.format())
+        return
+
     app = CloytSynchronizer(container)
     app.run()
@@ -0,0 +1,150 @@
+import logging
+import sys
+from argparse import ArgumentParser
+
+from dishka import make_container
+from sqlalchemy import Engine, select
+from sqlalchemy.orm import Session
+
+from cloyt.domain.models import Tenant
+from cloyt.infrastructure import (
+    AdminConfig,
+    DaemonConfig,
+    InfrastructureProvider,
+)
+from cloyt.apps.maintenance.admin_benchmark import (
+    benchmark_admin_views,
+    format_admin_benchmarks,
+)
+from cloyt.apps.maintenance.benchmark import (
+    benchmark_hot_queries,
+    format_benchmarks,
+)
+from cloyt.apps.maintenance.entries_benchmark import (
+    benchmark_time_entry_decoding,
+    format_decoding_benchmarks,
+)
+from cloyt.apps.maintenance.partitioning import (
+    maintain_work_item_partitions,
+    partition_work_item,
+)
+from cloyt.apps.maintenance.seeding import SeedSize, seed
+from cloyt.apps.onboarding.importer import (
+    employees_insert,
+    format_onboarding,
+    mark_existing,
+    read_employees_csv,
+    validate_employees,
+)
+
+
+def main():
+    parser = ArgumentParser(prog="cloyt-maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = subparsers.add_parser(
+        "seed",
+        help="fill the database with synthetic data",
+    )
+    for name, default in vars(SeedSize()).items():
+        seed_parser.add_argument(
+            f"--{name.replace('_', '-')}", type=int, default=default,
+        )
+
+    bench_parser = subparsers.add_parser(
+        "bench-queries",
+        help="capture EXPLAIN ANALYZE timings of the sync hot queries",
+    )
+    bench_parser.add_argument(
+        "--no-compare", action="store_true",
+        help="do not drop hot query indexes to compare plans without them",
+    )
+    bench_admin_parser = subparsers.add_parser(
+        "bench-admin",
+        help="time list and detail pages of every admin model view",
+    )
+    bench_admin_parser.add_argument(
+        "--url", default="http://127.0.0.1:80/admin",
+        help="url of the running admin",
+    )
+    bench_admin_parser.add_argument("--rounds", type=int, default=5)
+    bench_entries_parser = subparsers.add_parser(
+        "bench-entries",
+        help="measure CPU time and memory of time entry decoding",
+    )
+    bench_entries_parser.add_argument("--entries", type=int, default=1_000)
+    bench_entries_parser.add_argument("--rounds", type=int, default=50)
+    partition_parser = subparsers.add_parser(
+        "partition-work-item",
+        help="convert work_item to the table partitioned by month",
+    )
+    partition_parser.add_argument(
+        "--months-ahead", type=int, default=3,
+        help="number of partitions to create for next months",
+    )
+    subparsers.add_parser(
+        "maintain-partitions",
+        help="create next partitions of work_item and apply retention",
+    )
+    onboard_parser = subparsers.add_parser(
+        "onboard",
+        help="validate and insert employees from CSV with columns"
+             " full_name, clockify_token, youtrack_token, tenant and"
+             " comment",
+    )
+    onboard_parser.add_argument("path", help="path to the CSV file")
+    onboard_parser.add_argument(
+        "--dry-run", action="store_true",
+        help="validate tokens without inserting employees",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        stream=sys.stderr,
+        format="[%(asctime)s] [%(levelname)s] - %(name)s - %(message)s",
+    )
+    if args.command == "bench-entries":
+        print(format_decoding_benchmarks(benchmark_time_entry_decoding(
+            entries=args.entries, rounds=args.rounds,
+        )))
+        return
+
+    container = make_container(InfrastructureProvider())
+    engine = container.get(Engine)
+
+    if args.command == "seed":
+        tag = seed(engine, SeedSize(**{
+            name: getattr(args, name) for name in vars(SeedSize())
+        }))
+        print(f"Seeded with tag {tag}")
+    elif args.command == "bench-queries":
+        print(format_benchmarks(
+            benchmark_hot_queries(engine, compare=not args.no_compare),
+        ))
+    elif args.command == "bench-admin":
+        print(format_admin_benchmarks(benchmark_admin_views(
+            engine, container.get(AdminConfig), args.url, args.rounds,
+        )))
+    elif args.command == "partition-work-item":
+        with engine.begin() as connection:
+            partition_work_item(connection, months_ahead=args.months_ahead)
+    elif args.command == "maintain-partitions":
+        with engine.begin() as connection:
+            maintain_work_item_partitions(
+                connection, container.get(DaemonConfig),
+            )
+    elif args.command == "onboard":
+        with open(args.path, newline="") as f:
+            rows = read_employees_csv(f)
+        with Session(engine) as session:
+            tenants = {i.name: i for i in session.scalars(select(Tenant))}
+        validate_employees(
+            rows, container.get(DaemonConfig).youtrack_base_url, tenants,
+        )
+        if not args.dry_run and any(i.valid for i in rows):
+            with Session(engine) as session:
+                inserted = set(session.scalars(employees_insert(rows)))
+                session.commit()
+            mark_existing(rows, inserted)
+        print(format_onboarding(rows))